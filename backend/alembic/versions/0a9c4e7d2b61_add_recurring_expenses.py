@@ -0,0 +1,65 @@
+"""Add recurring expenses
+
+Revision ID: 0a9c4e7d2b61
+Revises: f6b2d8e4a913
+Create Date: 2026-10-17 18:12:40.318655
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9c4e7d2b61'
+down_revision: Union[str, Sequence[str], None] = 'f6b2d8e4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('recurring_expenses',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('frequency', sa.String(), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('next_occurrence', sa.Date(), nullable=False),
+    sa.Column('occurrence_count', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recurring_expenses_id'), 'recurring_expenses', ['id'], unique=False)
+    op.create_index(op.f('ix_recurring_expenses_next_occurrence'), 'recurring_expenses', ['next_occurrence'], unique=False)
+    op.create_index(op.f('ix_recurring_expenses_user_id'), 'recurring_expenses', ['user_id'], unique=False)
+    op.create_index(op.f('ix_recurring_expenses_wallet_id'), 'recurring_expenses', ['wallet_id'], unique=False)
+    op.add_column('expenses', sa.Column('recurring_expense_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'expenses_recurring_expense_id_fkey', 'expenses', 'recurring_expenses',
+        ['recurring_expense_id'], ['id'], ondelete='SET NULL'
+    )
+    # Backs ON CONFLICT DO NOTHING in app.core.recurring: one expense per rule and date
+    op.create_index('ix_expenses_recurring_expense_id_date', 'expenses', ['recurring_expense_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_expenses_recurring_expense_id_date', table_name='expenses')
+    op.drop_constraint('expenses_recurring_expense_id_fkey', 'expenses', type_='foreignkey')
+    op.drop_column('expenses', 'recurring_expense_id')
+    op.drop_index(op.f('ix_recurring_expenses_wallet_id'), table_name='recurring_expenses')
+    op.drop_index(op.f('ix_recurring_expenses_user_id'), table_name='recurring_expenses')
+    op.drop_index(op.f('ix_recurring_expenses_next_occurrence'), table_name='recurring_expenses')
+    op.drop_index(op.f('ix_recurring_expenses_id'), table_name='recurring_expenses')
+    op.drop_table('recurring_expenses')
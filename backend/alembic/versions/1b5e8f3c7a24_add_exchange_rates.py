@@ -0,0 +1,33 @@
+"""Add exchange rates
+
+Revision ID: 1b5e8f3c7a24
+Revises: 0a9c4e7d2b61
+Create Date: 2026-10-17 19:26:08.540127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b5e8f3c7a24'
+down_revision: Union[str, Sequence[str], None] = '0a9c4e7d2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('exchange_rates',
+    sa.Column('currency', sa.String(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('currency', 'date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('exchange_rates')
@@ -0,0 +1,55 @@
+"""Add indexes for hot queries
+
+Revision ID: a4c2e9f1b7d3
+Revises: 3715eebcf3b1
+Create Date: 2026-10-17 09:12:40.118352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c2e9f1b7d3'
+down_revision: Union[str, Sequence[str], None] = '3715eebcf3b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns); mirrors the declarations in app/models/models.py
+INDEXES = [
+    ('ix_expenses_wallet_id_date_id', 'expenses', ['wallet_id', 'date', 'id']),
+    (op.f('ix_expenses_user_id'), 'expenses', ['user_id']),
+    ('ix_wallet_shares_user_id_wallet_id', 'wallet_shares', ['user_id', 'wallet_id']),
+    (op.f('ix_wallets_owner_id'), 'wallets', ['owner_id']),
+    ('ix_budgets_user_id_category_start_date', 'budgets', ['user_id', 'category', 'start_date']),
+    (op.f('ix_goals_user_id'), 'goals', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build, but cannot
+    # run inside a transaction. IF NOT EXISTS covers tables that init_db created
+    # from the models, which already carry these indexes.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,47 @@
+"""Add spending rollups
+
+Revision ID: c5d8f2a61e07
+Revises: b7e3d1a9c4f2
+Create Date: 2026-10-17 13:21:05.884310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8f2a61e07'
+down_revision: Union[str, Sequence[str], None] = 'b7e3d1a9c4f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('spending_rollups',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('wallet_id', 'user_id', 'category', 'month')
+    )
+    # Backfill from existing expenses; same buckets as app.core.rollups.month_of
+    op.execute("""
+        INSERT INTO spending_rollups (wallet_id, user_id, category, month, count, total)
+        SELECT wallet_id, user_id, coalesce(category, ''),
+               date_trunc('month', timezone('UTC', date))::date,
+               count(id), sum(amount)
+        FROM expenses
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('spending_rollups')
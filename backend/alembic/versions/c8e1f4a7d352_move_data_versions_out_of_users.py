@@ -0,0 +1,43 @@
+"""Move data versions out of users
+
+Revision ID: c8e1f4a7d352
+Revises: 1b5e8f3c7a24
+Create Date: 2026-10-17 21:04:37.118263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f4a7d352'
+down_revision: Union[str, Sequence[str], None] = '1b5e8f3c7a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_data_versions',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('wallet_data_versions',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id')
+    )
+    # Every list ETag changes once; clients refetch a single time
+    op.drop_column('users', 'data_version')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.drop_table('wallet_data_versions')
+    op.drop_table('user_data_versions')
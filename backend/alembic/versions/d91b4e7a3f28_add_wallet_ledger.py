@@ -0,0 +1,69 @@
+"""Add wallet ledger and balance snapshots
+
+Revision ID: d91b4e7a3f28
+Revises: c5d8f2a61e07
+Create Date: 2026-10-17 15:42:18.206731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91b4e7a3f28'
+down_revision: Union[str, Sequence[str], None] = 'c5d8f2a61e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wallet_ledger',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('reference_id', sa.UUID(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_wallet_ledger_wallet_id_id', 'wallet_ledger', ['wallet_id', 'id'], unique=False)
+    op.create_table('wallet_balance_snapshots',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('last_entry_id', sa.BigInteger(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id', 'last_entry_id')
+    )
+    # Existing balances become each wallet's first snapshot, covering no entries
+    op.execute("""
+        INSERT INTO wallet_balance_snapshots (wallet_id, last_entry_id, balance)
+        SELECT id, 0, coalesce(balance, 0) FROM wallets
+    """)
+    op.drop_column('wallets', 'balance')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('wallets', sa.Column('balance', sa.Float(), nullable=True))
+    op.execute("""
+        UPDATE wallets w SET balance = coalesce(s.balance, 0) + coalesce((
+            SELECT sum(e.amount) FROM wallet_ledger e
+            WHERE e.wallet_id = w.id AND e.id > coalesce(s.last_entry_id, 0)
+        ), 0)
+        FROM wallets w2
+        LEFT JOIN LATERAL (
+            SELECT balance, last_entry_id FROM wallet_balance_snapshots
+            WHERE wallet_id = w2.id ORDER BY last_entry_id DESC LIMIT 1
+        ) s ON true
+        WHERE w2.id = w.id
+    """)
+    op.drop_table('wallet_balance_snapshots')
+    op.drop_index('ix_wallet_ledger_wallet_id_id', table_name='wallet_ledger')
+    op.drop_table('wallet_ledger')
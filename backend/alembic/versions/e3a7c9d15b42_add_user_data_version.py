@@ -0,0 +1,28 @@
+"""Add user data version
+
+Revision ID: e3a7c9d15b42
+Revises: d91b4e7a3f28
+Create Date: 2026-10-17 16:12:08.294611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c9d15b42'
+down_revision: Union[str, Sequence[str], None] = 'd91b4e7a3f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
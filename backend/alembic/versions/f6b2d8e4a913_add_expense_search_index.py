@@ -0,0 +1,40 @@
+"""Add expense search index
+
+Revision ID: f6b2d8e4a913
+Revises: e3a7c9d15b42
+Create Date: 2026-10-17 17:03:51.772940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b2d8e4a913'
+down_revision: Union[str, Sequence[str], None] = 'e3a7c9d15b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrors EXPENSE_SEARCH_DOCUMENT in app/models/models.py; queries only use the index if they match it
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps expenses writable while the index builds
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_expenses_search ON expenses USING gin (({SEARCH_DOCUMENT}))"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_expenses_search")
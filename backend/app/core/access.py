@@ -0,0 +1,87 @@
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import User, Wallet, wallet_shares
+from .database import get_async_db
+from .security import get_current_user
+
+
+def accessible_wallet_ids(user_id: uuid.UUID):
+    """Selectable of the ids of every wallet the user owns or has been shared into"""
+    owned = select(Wallet.id).where(Wallet.owner_id == user_id)
+    shared = select(wallet_shares.c.wallet_id).where(wallet_shares.c.user_id == user_id)
+    return owned.union(shared)
+
+
+class WalletAccess:
+    """Answers "can the current user access wallet W" for the life of one request.
+
+    Each wallet is resolved with a single query that loads the wallet row together
+    with an EXISTS probe on wallet_shares, so the cost does not depend on how many
+    members a wallet has. Answers are memoized, so repeated checks are free.
+    """
+
+    def __init__(self, db: AsyncSession, user: User):
+        self.db = db
+        self.user = user
+        self._resolved: Dict[uuid.UUID, Optional[Tuple[Wallet, bool]]] = {}
+
+    async def prefetch(self, wallet_ids: Iterable[uuid.UUID]) -> None:
+        """Resolve every not yet resolved wallet with one query, so later checks on them are free"""
+        missing = {wallet_id for wallet_id in wallet_ids if wallet_id not in self._resolved}
+        if not missing:
+            return
+        is_member = exists().where(
+            wallet_shares.c.wallet_id == Wallet.id,
+            wallet_shares.c.user_id == self.user.id
+        )
+        rows = (await self.db.execute(
+            select(Wallet, is_member).where(Wallet.id.in_(missing))
+        )).all()
+        for wallet_id in missing:
+            self._resolved[wallet_id] = None
+        for wallet, member in rows:
+            self._resolved[wallet.id] = (wallet, wallet.owner_id == self.user.id or bool(member))
+
+    async def _resolve(self, wallet_id: uuid.UUID) -> Optional[Tuple[Wallet, bool]]:
+        if wallet_id not in self._resolved:
+            await self.prefetch([wallet_id])
+        return self._resolved[wallet_id]
+
+    async def get(self, wallet_id: uuid.UUID) -> Optional[Wallet]:
+        """Return the wallet if it exists and the user may access it, else None"""
+        resolved = await self._resolve(wallet_id)
+        if resolved is None or not resolved[1]:
+            return None
+        return resolved[0]
+
+    async def can_access(self, wallet_id: uuid.UUID) -> bool:
+        """Whether the user owns the wallet or it has been shared with them"""
+        return await self.get(wallet_id) is not None
+
+    async def require(
+        self,
+        wallet_id: uuid.UUID,
+        detail: str = "Not authorized to access this wallet",
+        not_found_detail: str = "Wallet not found"
+    ) -> Wallet:
+        """Return the wallet, raising 404 if it does not exist and 403 if it is not accessible"""
+        resolved = await self._resolve(wallet_id)
+        if resolved is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+        wallet, allowed = resolved
+        if not allowed:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+        return wallet
+
+
+async def get_wallet_access(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+) -> WalletAccess:
+    """Dependency providing the request-scoped wallet access resolver"""
+    return WalletAccess(db, current_user)
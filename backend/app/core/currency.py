@@ -0,0 +1,199 @@
+import asyncio
+import csv
+import hashlib
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import os
+
+from sqlalchemy import case, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from ..models.models import ExchangeRate
+from .rollups import UPSERT_INSERTS
+
+load_dotenv()
+
+# Currency the rates in exchange_rates are quoted against, and the default one for totals
+BASE_CURRENCY = os.getenv("BASE_CURRENCY", "INR").upper()
+# Rates file loaded into exchange_rates on startup, if set, and how long the cache trusts the table
+EXCHANGE_RATES_FILE = os.getenv("EXCHANGE_RATES_FILE", "")
+EXCHANGE_RATE_CACHE_SECONDS = float(os.getenv("EXCHANGE_RATE_CACHE_SECONDS", "3600"))
+
+RATES_FILE_COLUMNS = ("date", "currency", "rate")
+RATES_LOAD_CHUNK = 1000
+
+
+def read_rates_file(path: str) -> List[dict]:
+    """Parse a CSV file with a date,currency,rate header into exchange_rates rows"""
+    rows = []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = set(RATES_FILE_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+        for line, record in enumerate(reader, start=2):
+            try:
+                row = {
+                    "currency": record["currency"].strip().upper(),
+                    "date": date.fromisoformat(record["date"].strip()),
+                    "rate": float(record["rate"]),
+                }
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{path}:{line}: {e}") from None
+            if not row["currency"] or row["rate"] <= 0:
+                raise ValueError(f"{path}:{line}: currency must be set and rate positive")
+            rows.append(row)
+    return rows
+
+
+def load_rates_file(conn: Connection, path: str) -> int:
+    """Upsert the rates in a file into exchange_rates; the caller commits. Returns the rows read."""
+    rows = read_rates_file(path)
+    table = ExchangeRate.__table__
+    stmt = UPSERT_INSERTS[conn.dialect.name](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.currency, table.c.date],
+        set_={"rate": stmt.excluded.rate}
+    )
+    for start in range(0, len(rows), RATES_LOAD_CHUNK):
+        conn.execute(stmt, rows[start:start + RATES_LOAD_CHUNK])
+    return len(rows)
+
+
+def rate_on(currency, day):
+    """SQL counterpart of RateCache.rate for a currency with rates, read from exchange_rates"""
+    currency = func.upper(func.coalesce(currency, BASE_CURRENCY))
+    latest = select(ExchangeRate.rate)\
+        .where(ExchangeRate.currency == currency, ExchangeRate.date <= day)\
+        .order_by(ExchangeRate.date.desc())\
+        .limit(1)\
+        .scalar_subquery()
+    earliest = select(ExchangeRate.rate)\
+        .where(ExchangeRate.currency == currency)\
+        .order_by(ExchangeRate.date)\
+        .limit(1)\
+        .scalar_subquery()
+    return case((currency == BASE_CURRENCY, 1.0), else_=func.coalesce(latest, earliest))
+
+
+class MissingExchangeRate(LookupError):
+    """exchange_rates has no rate at all for a currency"""
+
+    def __init__(self, currency: str):
+        super().__init__(f"No exchange rate for {currency}")
+        self.currency = currency
+
+
+class RateCache:
+    """All exchange rates in memory as per-currency arrays sorted by date.
+
+    A lookup bisects the dates of one currency and uses the latest rate on or
+    before the day, or the earliest one for days before the first rate. The
+    whole table is reloaded in one query once the cache is older than
+    EXCHANGE_RATE_CACHE_SECONDS.
+
+    version fingerprints the loaded rates, so responses converted with them can
+    put it in their ETag and change when the rates do.
+    """
+
+    def __init__(self, ttl: float = EXCHANGE_RATE_CACHE_SECONDS):
+        self.ttl = ttl
+        self._dates: Dict[str, List[date]] = {}
+        self._rates: Dict[str, List[float]] = {}
+        self._loaded_at: Optional[float] = None
+        self.version = ""
+        self._lock = asyncio.Lock()
+
+    def replace(self, rows: Iterable[Tuple[str, date, float]]) -> None:
+        """Swap in rates from (currency, date, rate) rows sorted by currency and date"""
+        dates, rates = defaultdict(list), defaultdict(list)
+        fingerprint = hashlib.sha256()
+        for currency, day, rate in rows:
+            dates[currency].append(day)
+            rates[currency].append(rate)
+            fingerprint.update(f"{currency}:{day.isoformat()}:{rate!r};".encode())
+        self._dates, self._rates = dict(dates), dict(rates)
+        self.version = fingerprint.hexdigest()[:16]
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db: AsyncSession) -> "RateCache":
+        """Reload from exchange_rates if the cache is empty or stale"""
+        if self._fresh():
+            return self
+        async with self._lock:
+            if not self._fresh():
+                result = await db.execute(
+                    select(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.rate)
+                    .order_by(ExchangeRate.currency, ExchangeRate.date)
+                )
+                self.replace(result.all())
+        return self
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def knows(self, currency: Optional[str]) -> bool:
+        currency = (currency or BASE_CURRENCY).upper()
+        return currency == BASE_CURRENCY or currency in self._dates
+
+    def rate(self, currency: Optional[str], day: date) -> float:
+        """Base currency units per unit of currency on a day.
+
+        Raises MissingExchangeRate for a currency without any rate rather than
+        guessing one.
+        """
+        currency = (currency or BASE_CURRENCY).upper()
+        if currency == BASE_CURRENCY:
+            return 1.0
+        dates = self._dates.get(currency)
+        if not dates:
+            raise MissingExchangeRate(currency)
+        return self._rates[currency][max(bisect_right(dates, day) - 1, 0)]
+
+    def single_rate(self, currency: Optional[str], first: date, last: date) -> Optional[float]:
+        """The rate of every day from first to last if it is the same one, else None"""
+        currency = (currency or BASE_CURRENCY).upper()
+        if currency == BASE_CURRENCY:
+            return 1.0
+        dates = self._dates.get(currency)
+        if not dates:
+            raise MissingExchangeRate(currency)
+        index = max(bisect_right(dates, first) - 1, 0)
+        return self._rates[currency][index] if index == max(bisect_right(dates, last) - 1, 0) else None
+
+    def convert_groups(
+        self,
+        rows: Iterable[Tuple[Hashable, Optional[str], date, float]],
+        target: str
+    ) -> Tuple[Dict[Hashable, float], Set[str]]:
+        """Sum (key, currency, day, amount) aggregate rows into key -> total in target.
+
+        Callers group their SQL aggregates by wallet currency and day or month, so
+        this does one multiplication per group rather than per expense. Groups in a
+        currency without rates are left out; their currencies are returned with the
+        totals so the response can say what it is missing.
+        """
+        totals: Dict[Hashable, float] = defaultdict(float)
+        missing: Set[str] = set()
+        target_rates: Dict[date, float] = {}
+        for key, currency, day, amount in rows:
+            if isinstance(day, datetime):
+                day = day.date()
+            if day not in target_rates:
+                target_rates[day] = self.rate(target, day)
+            try:
+                totals[key] += float(amount or 0.0) * self.rate(currency, day) / target_rates[day]
+            except MissingExchangeRate as e:
+                missing.add(e.currency)
+        return totals, missing
+
+
+rates = RateCache()
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+import os
+
+from sqlalchemy import and_, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from dotenv import load_dotenv
+
+from ..models.models import WalletBalanceSnapshot, WalletLedgerEntry
+from .database import AsyncSessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often the background task rolls ledger entries into snapshots (0 disables it),
+# and how many entries a wallet must have accumulated since its last snapshot
+LEDGER_COMPACTION_INTERVAL_SECONDS = float(os.getenv("LEDGER_COMPACTION_INTERVAL_SECONDS", "60"))
+LEDGER_COMPACTION_MIN_ENTRIES = int(os.getenv("LEDGER_COMPACTION_MIN_ENTRIES", "100"))
+
+# (newest ledger id, when it was read) as returned by ledger_horizon
+Horizon = Tuple[int, Optional[datetime]]
+
+
+def record(
+    db: AsyncSession,
+    wallet_id: uuid.UUID,
+    amount: float,
+    kind: str,
+    reference_id: Optional[uuid.UUID] = None,
+    user_id: Optional[uuid.UUID] = None
+) -> None:
+    """Add a signed balance change for a wallet to the session; the caller commits.
+
+    Writers only insert, so concurrent changes to one wallet neither lose updates
+    nor wait on the wallet row.
+    """
+    if amount:
+        db.add(WalletLedgerEntry(
+            wallet_id=wallet_id,
+            amount=amount,
+            kind=kind,
+            reference_id=reference_id,
+            user_id=user_id,
+        ))
+
+
+async def ledger_horizon(db: AsyncSession) -> Horizon:
+    """The newest committed ledger id and, on PostgreSQL, the server time it was read at.
+
+    Ledger ids are allocated before their transaction commits, so a writer that
+    is still running may hold an id below this one. Every such writer allocated
+    its id, and so started, before the returned time.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return (await db.execute(select(func.coalesce(func.max(WalletLedgerEntry.id), 0)))).scalar_one(), None
+    row = (await db.execute(
+        select(func.coalesce(func.max(WalletLedgerEntry.id), 0), func.clock_timestamp())
+    )).one()
+    return row[0], row[1]
+
+
+async def horizon_settled(db: AsyncSession, horizon: Horizon) -> bool:
+    """Whether every transaction that was running when the horizon was read has ended.
+
+    Once it has, no entry at or below the horizon can still appear. SQLite runs one
+    writer at a time, so its horizon is settled as soon as it is read.
+    """
+    _, read_at = horizon
+    if read_at is None:
+        return True
+    running = (await db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_stat_activity "
+        "WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start <= :read_at)"
+    ), {"read_at": read_at})).scalar()
+    return not running
+
+
+async def compact(db: AsyncSession, up_to: int, min_entries: int = LEDGER_COMPACTION_MIN_ENTRIES) -> int:
+    """Write a new snapshot for every wallet with at least min_entries entries since its last one.
+
+    Only entries with ids up to up_to count, which must be a settled horizon, so a
+    writer still running cannot commit an entry below a new snapshot's position.
+    Nothing is locked; writers keep inserting while the snapshots are taken.
+    Returns the number of snapshots written.
+    """
+    latest_position = select(
+        WalletBalanceSnapshot.wallet_id,
+        func.max(WalletBalanceSnapshot.last_entry_id).label("last_entry_id")
+    ).group_by(WalletBalanceSnapshot.wallet_id).subquery()
+    snapshot = aliased(WalletBalanceSnapshot)
+    latest = select(snapshot.wallet_id, snapshot.last_entry_id, snapshot.balance)\
+        .join(latest_position, and_(
+            snapshot.wallet_id == latest_position.c.wallet_id,
+            snapshot.last_entry_id == latest_position.c.last_entry_id
+        )).subquery()
+
+    entry = WalletLedgerEntry
+    new_snapshots = select(
+        entry.wallet_id,
+        func.max(entry.id),
+        func.coalesce(latest.c.balance, 0.0) + func.sum(entry.amount),
+    ).select_from(entry)\
+        .outerjoin(latest, latest.c.wallet_id == entry.wallet_id)\
+        .where(entry.id > func.coalesce(latest.c.last_entry_id, 0), entry.id <= up_to)\
+        .group_by(entry.wallet_id, latest.c.balance)\
+        .having(func.count(entry.id) >= min_entries)
+
+    result = await db.execute(
+        insert(WalletBalanceSnapshot).from_select(["wallet_id", "last_entry_id", "balance"], new_snapshots)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def run_compaction(interval: float = LEDGER_COMPACTION_INTERVAL_SECONDS) -> None:
+    """Compact the ledger every interval seconds until cancelled.
+
+    Each pass compacts up to the horizon read on an earlier pass once it has
+    settled, then reads the next one, so a snapshot normally trails the ledger by
+    one interval.
+    """
+    horizon = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                if horizon is None:
+                    horizon = await ledger_horizon(db)
+                if await horizon_settled(db, horizon):
+                    written = await compact(db, horizon[0])
+                    if written:
+                        logger.info("Wrote %d wallet balance snapshots", written)
+                    horizon = await ledger_horizon(db)
+                    await db.commit()
+                else:
+                    await db.rollback()
+        except Exception:
+            logger.exception("Wallet ledger compaction failed")
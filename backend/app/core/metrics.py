@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Route label for requests that matched no route, so unknown URLs cannot explode cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class HttpMetrics:
+    """Request counts, latency histograms and in-flight gauges keyed by templated route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.latency_buckets: Dict[Tuple[str, str], list] = {}
+        self.latency_sum: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.latency_count: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.in_flight: Dict[str, int] = defaultdict(int)
+
+    def started(self, method: str) -> None:
+        with self._lock:
+            self.in_flight[method] += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            self.in_flight[method] -= 1
+            self.requests[(method, route, status)] += 1
+            buckets = self.latency_buckets.setdefault(key, [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+                    break
+            self.latency_sum[key] += seconds
+            self.latency_count[key] += 1
+
+    def render(self) -> str:
+        """The metrics in Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by method, route template and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds Time from receiving a request to finishing its response.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), buckets in sorted(self.latency_buckets.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += count
+                    labels = _labels(method=method, route=route, le=_bound(bound))
+                    lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"http_request_duration_seconds_sum{labels} {self.latency_sum[(method, route)]}")
+                lines.append(f"http_request_duration_seconds_count{labels} {self.latency_count[(method, route)]}")
+
+            lines += [
+                "# HELP http_requests_in_progress Requests currently being handled, by method.",
+                "# TYPE http_requests_in_progress gauge",
+            ]
+            for method, count in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_progress{_labels(method=method)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+http_metrics = HttpMetrics()
+
+
+class MetricsMiddleware:
+    """Records every HTTP request in http_metrics, labeled by the route that served it"""
+
+    def __init__(self, app, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+        self.metrics.started(method)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; its path is the template
+            route = scope.get("route")
+            self.metrics.finished(
+                method,
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event, exc
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+class PoolStats:
+    """Counters for one engine's connection pool, fed by pool events"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def attach(self, engine) -> None:
+        """Listen to the pool events of an engine (sync, or the sync side of an async engine)"""
+        self.pool = engine.pool
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def observe_wait(self, seconds: float, timed_out: bool) -> None:
+        """Record how long a caller waited for the pool to hand out a connection"""
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        """Current pool occupancy and the counters collected so far"""
+        pool = self.pool
+        with self._lock:
+            return {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait": {
+                    "count": self.wait_count,
+                    "total_seconds": self.wait_total,
+                    "max_seconds": self.wait_max,
+                    "buckets": {
+                        ("+Inf" if bound == float("inf") else str(bound)): count
+                        for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                    },
+                },
+            }
+
+
+def instrumented(poolclass, stats: PoolStats):
+    """Subclass a queue pool so the time callers spend waiting for a connection is recorded"""
+
+    class InstrumentedPool(poolclass):
+        def _do_get(self):
+            start = time.perf_counter()
+            timed_out = False
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                timed_out = True
+                raise
+            finally:
+                stats.observe_wait(time.perf_counter() - start, timed_out)
+
+    InstrumentedPool.__name__ = "Instrumented" + poolclass.__name__
+    return InstrumentedPool
+
+
+# Stats for every engine created by app.core.database, keyed by engine name
+pool_stats: Dict[str, PoolStats] = {}
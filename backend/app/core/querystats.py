@@ -0,0 +1,102 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+import os
+
+from sqlalchemy import event
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Opt-in per-request statement counting; when disabled no listeners are installed
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "false").lower() == "true"
+# A request repeating one statement more than this many times is flagged as a likely N+1
+QUERY_STATS_REPEAT_THRESHOLD = int(os.getenv("QUERY_STATS_REPEAT_THRESHOLD", "5"))
+
+
+class RequestQueryStats:
+    """Statements and database time accumulated by one request"""
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Statements are parameterized, so their text is their shape
+        self.shapes = Counter()
+
+    def most_repeated(self):
+        """(statement, executions) for the most repeated statement, or None"""
+        common = self.shapes.most_common(1)
+        return common[0] if common else None
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.duration += time.perf_counter() - getattr(context, "_query_stats_start", time.perf_counter())
+        stats.count += 1
+        stats.shapes[statement] += 1
+
+
+def install(engine) -> None:
+    """Count statements run on an engine (sync, or the sync side of an async engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Reports each request's statement count and database time in a Server-Timing header.
+
+    Requests that run one statement more than repeat_threshold times get an extra
+    "db-repeat" metric and a warning in the log. Only statements issued before the
+    response starts are reported, so streamed bodies are counted partially.
+    """
+
+    def __init__(self, app, repeat_threshold: int = QUERY_STATS_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", self._server_timing(scope, stats).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+    def _server_timing(self, scope, stats: RequestQueryStats) -> str:
+        metrics = [f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} statements"']
+        repeated = stats.most_repeated()
+        if repeated is not None and repeated[1] > self.repeat_threshold:
+            statement, executions = repeated
+            metrics.append(f'db-repeat;desc="{executions}x same statement"')
+            logger.warning(
+                "%s %s ran one statement %d times (%d statements total): %s",
+                scope["method"], scope["path"], executions, stats.count, " ".join(statement.split())[:200]
+            )
+        return ", ".join(metrics)
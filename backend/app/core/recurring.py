@@ -0,0 +1,165 @@
+import asyncio
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Tuple
+import os
+
+from sqlalchemy import exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from ..models.models import Expense, RecurringExpense, Wallet, wallet_shares
+from .database import AsyncSessionLocal
+from .rollups import RollupDeltas, UPSERT_INSERTS
+from .versioning import bump_wallets
+from . import ledger
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often the background task materializes due occurrences (0 disables it), how many
+# rules one transaction handles, and how many occurrences of one rule it catches up on
+RECURRING_INTERVAL_SECONDS = float(os.getenv("RECURRING_INTERVAL_SECONDS", "300"))
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", "1000"))
+RECURRING_MAX_CATCH_UP = int(os.getenv("RECURRING_MAX_CATCH_UP", "366"))
+
+
+def occurrence(start: date, frequency: str, interval: int, index: int) -> date:
+    """Date of the index-th occurrence (from 0) of a rule.
+
+    Monthly and yearly rules keep the start date's day, clamped to shorter months,
+    so a rule starting on the 31st falls on the last day of February and then on
+    the 31st again.
+    """
+    if frequency == "daily":
+        return start + timedelta(days=index * interval)
+    if frequency == "weekly":
+        return start + timedelta(weeks=index * interval)
+    months = index * interval * (12 if frequency == "yearly" else 1)
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    return date(year, month + 1, min(start.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def skip_to(rule: RecurringExpense, day: date) -> Tuple[int, date]:
+    """Index and date of the rule's first unprocessed occurrence on or after day.
+
+    Used when a paused rule resumes, so that the scheduler only catches up on its
+    own downtime and not on the dates the rule was paused for.
+    """
+    index, when = rule.occurrence_count, rule.next_occurrence
+    while when < day:
+        index += 1
+        when = occurrence(rule.start_date, rule.frequency, rule.interval, index)
+    return index, when
+
+
+def _due_rules(today: date, limit: int):
+    """Active rules with an occurrence due by today whose creator can still use the wallet"""
+    can_use_wallet = or_(
+        Wallet.owner_id == RecurringExpense.user_id,
+        exists().where(
+            wallet_shares.c.wallet_id == RecurringExpense.wallet_id,
+            wallet_shares.c.user_id == RecurringExpense.user_id
+        )
+    )
+    return select(RecurringExpense)\
+        .join(Wallet, Wallet.id == RecurringExpense.wallet_id)\
+        .where(
+            RecurringExpense.is_active,
+            RecurringExpense.next_occurrence <= today,
+            or_(RecurringExpense.end_date.is_(None), RecurringExpense.next_occurrence <= RecurringExpense.end_date),
+            can_use_wallet
+        )\
+        .order_by(RecurringExpense.next_occurrence, RecurringExpense.id)\
+        .limit(limit)\
+        .with_for_update(of=RecurringExpense, skip_locked=True)
+
+
+async def materialize_batch(
+    db: AsyncSession,
+    today: date,
+    batch_size: int = RECURRING_BATCH_SIZE,
+    max_catch_up: int = RECURRING_MAX_CATCH_UP
+) -> Tuple[int, int]:
+    """Materialize the due occurrences of up to batch_size rules in one transaction.
+
+    All occurrences go in with one multi-row INSERT that skips any (rule, date) that
+    already exists, so overlapping runs on several workers never duplicate an
+    expense; balances and rollups follow only the rows actually inserted, with one
+    ledger entry per wallet. Returns the number of rules processed and of
+    expenses created.
+    """
+    rules = (await db.execute(_due_rules(today, batch_size))).scalars().all()
+    if not rules:
+        await db.commit()
+        return 0, 0
+
+    rows = []
+    advanced = []
+    for rule in rules:
+        last = min(today, rule.end_date) if rule.end_date else today
+        index, when = rule.occurrence_count, rule.next_occurrence
+        for _ in range(max_catch_up):
+            if when > last:
+                break
+            rows.append({
+                "amount": rule.amount,
+                "description": rule.description,
+                "category": rule.category,
+                "date": datetime.combine(when, time.min, tzinfo=timezone.utc),
+                "wallet_id": rule.wallet_id,
+                "user_id": rule.user_id,
+                "recurring_expense_id": rule.id,
+            })
+            index += 1
+            when = occurrence(rule.start_date, rule.frequency, rule.interval, index)
+        advanced.append({"id": rule.id, "occurrence_count": index, "next_occurrence": when})
+
+    table = Expense.__table__
+    stmt = UPSERT_INSERTS[db.bind.dialect.name](table)\
+        .on_conflict_do_nothing(index_elements=[table.c.recurring_expense_id, table.c.date])\
+        .returning(table.c.wallet_id, table.c.user_id, table.c.category, table.c.date, table.c.amount)
+    inserted = (await db.execute(stmt, rows)).all() if rows else []
+
+    deltas = defaultdict(float)
+    rollups = RollupDeltas()
+    for wallet_id, user_id, category, when, amount in inserted:
+        deltas[wallet_id] -= amount
+        rollups.add(wallet_id, user_id, category, when, amount)
+    await rollups.apply(db)
+    for wallet_id, delta in deltas.items():
+        ledger.record(db, wallet_id, delta, "recurring")
+
+    # Bulk UPDATE by primary key, one executemany for the whole batch
+    await db.execute(update(RecurringExpense), advanced)
+    # Every processed rule moved on, even where all its dates already existed
+    await bump_wallets(db, list({rule.wallet_id for rule in rules}))
+    await db.commit()
+    return len(rules), len(inserted)
+
+
+async def materialize_due(db: AsyncSession, today: date) -> int:
+    """Catch every rule up to today, one batch transaction at a time; returns expenses created"""
+    created = 0
+    while True:
+        rules, inserted = await materialize_batch(db, today)
+        created += inserted
+        if rules == 0:
+            return created
+
+
+async def run_scheduler(interval: float = RECURRING_INTERVAL_SECONDS) -> None:
+    """Materialize due recurring expenses every interval seconds until cancelled"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                created = await materialize_due(db, datetime.now(timezone.utc).date())
+            if created:
+                logger.info("Materialized %d recurring expenses", created)
+        except Exception:
+            logger.exception("Recurring expense materialization failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,102 @@
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import Expense, SpendingRollup
+
+# (wallet_id, user_id, category, month) -> [count, total]
+RollupKey = Tuple[uuid.UUID, uuid.UUID, str, date]
+
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def month_of(when: datetime) -> date:
+    """First day of the UTC calendar month containing a timestamp; naive values are taken as UTC"""
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return date(when.year, when.month, 1)
+
+
+def month_bucket(column):
+    """SQL counterpart of month_of, for rebuilding rollups in PostgreSQL"""
+    return cast(func.date_trunc("month", func.timezone("UTC", column)), Date)
+
+
+def day_bucket(column, dialect: str):
+    """UTC calendar day of a timestamp in SQL, whatever the session time zone.
+
+    SQLite has no time zones and already stores timestamps as naive UTC.
+    """
+    if dialect == "postgresql":
+        column = func.timezone("UTC", column)
+    return func.date(column, type_=Date)
+
+
+def rollup_key(wallet_id: uuid.UUID, user_id: uuid.UUID, category: Optional[str], when: datetime) -> RollupKey:
+    return wallet_id, user_id, category or "", month_of(when)
+
+
+class RollupDeltas:
+    """Count and total changes accumulated by one request, applied with one upsert"""
+
+    def __init__(self):
+        self._deltas: Dict[RollupKey, list] = defaultdict(lambda: [0, 0.0])
+
+    def add(self, wallet_id, user_id, category, when, amount: float, count: int = 1) -> None:
+        delta = self._deltas[rollup_key(wallet_id, user_id, category, when)]
+        delta[0] += count
+        delta[1] += amount * count
+
+    def add_expense(self, expense: Expense) -> None:
+        self.add(expense.wallet_id, expense.user_id, expense.category, expense.date, expense.amount)
+
+    def remove_expense(self, expense: Expense) -> None:
+        self.add(expense.wallet_id, expense.user_id, expense.category, expense.date, expense.amount, count=-1)
+
+    def items(self) -> Iterable[Tuple[RollupKey, list]]:
+        return ((key, delta) for key, delta in self._deltas.items() if delta[0] or delta[1])
+
+    async def apply(self, db: AsyncSession) -> None:
+        """Upsert the accumulated deltas inside the session's current transaction"""
+        params = [
+            {"wallet_id": w, "user_id": u, "category": c, "month": m, "count": n, "total": t}
+            for (w, u, c, m), (n, t) in self.items()
+        ]
+        if not params:
+            return
+        table = SpendingRollup.__table__
+        stmt = UPSERT_INSERTS[db.bind.dialect.name](table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.wallet_id, table.c.user_id, table.c.category, table.c.month],
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "total": table.c.total + stmt.excluded.total,
+            },
+        )
+        await db.execute(stmt, params)
+
+        # A bucket whose last expense moved out carries no information
+        if any(n < 0 for _, (n, _) in self.items()):
+            touched = {w for (w, _, _, _), _ in self.items()}
+            await db.execute(
+                delete(table).where(table.c.wallet_id.in_(touched), table.c.count <= 0)
+            )
+        self._deltas.clear()
+
+
+def rebuild_query():
+    """Select computing every rollup row from the expenses table (PostgreSQL)"""
+    month = month_bucket(Expense.date)
+    category = func.coalesce(Expense.category, "")
+    return select(
+        Expense.wallet_id, Expense.user_id, category.label("category"), month.label("month"),
+        func.count(Expense.id).label("count"), func.sum(Expense.amount).label("total"),
+    ).group_by(Expense.wallet_id, Expense.user_id, category, month)
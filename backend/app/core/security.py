@@ -1,10 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 from app.models import models
@@ -12,7 +15,8 @@ from app.models import models
 from ..models import User
 
 from ..schemas import UserCreate, TokenData
-from ..core.database import get_db
+from ..core.database import get_async_db
+from ..core.cache import TTLCache
 
 # Load environment variables
 load_dotenv()
@@ -22,7 +26,23 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Resolved principals, keyed by token subject (email). Entries are detached User
+# snapshots; anything that changes or removes a user must call invalidate_principal.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# bcrypt cost factor; each increment doubles the CPU time of a hash or verify
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads reserved for hashing. bcrypt releases the GIL, so these run in parallel
+# without stalling the event loop; 0 hashes inline on the calling thread.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+password_executor = (
+    ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    if PASSWORD_HASH_WORKERS > 0 else None
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -33,6 +53,20 @@ def get_password_hash(password: str) -> str:
     """Generate a password hash"""
     return pwd_context.hash(password)
 
+async def _run_password_work(func, *args):
+    """Run a bcrypt operation on the password pool, queueing when every worker is busy"""
+    if password_executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop"""
+    return await _run_password_work(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash without blocking the event loop"""
+    return await _run_password_work(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -45,7 +79,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
 ) -> models.User:
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -62,10 +96,25 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+    cached_user = principal_cache.get(token_data.email)
+    if cached_user is not None:
+        # Attach a copy of the snapshot to this session without emitting SQL
+        return await db.merge(cached_user, load=False)
+
+    user = (await db.execute(
+        select(models.User).where(models.User.email == token_data.email)
+    )).scalars().first()
     if user is None:
         raise credentials_exception
-    return user
+
+    # Cache the loaded instance and hand the request its own attached copy
+    db.expunge(user)
+    principal_cache.set(token_data.email, user)
+    return await db.merge(user, load=False)
+
+def invalidate_principal(email: str) -> None:
+    """Forget the cached principal for a user whose account changed or was removed"""
+    principal_cache.invalidate(email)
 
 async def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
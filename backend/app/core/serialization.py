@@ -0,0 +1,45 @@
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from typing_extensions import TypedDict
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson; byte-identical to the default for the types we emit.
+
+    OPT_UTC_Z writes UTC offsets as "Z", the way Pydantic does.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class RowSerializer:
+    """Fetches and encodes rows in the JSON shape of a response schema without ORM objects.
+
+    Rows are selected as plain tuples of the model columns named like the schema's
+    fields, checked and coerced by a TypeAdapter compiled once from those fields and
+    then encoded by FastJSONResponse. Endpoints keep declaring the schema as their
+    response_model, so the OpenAPI document does not change.
+    """
+
+    def __init__(self, schema: Type[BaseModel], model):
+        self.fields = list(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+        row_type = TypedDict(
+            f"{schema.__name__}Row", {name: field.annotation for name, field in schema.model_fields.items()}
+        )
+        self.adapter = TypeAdapter(List[row_type])
+
+    def select(self):
+        return select(*self.columns)
+
+    def rows(self, result: Iterable[tuple]) -> List[dict]:
+        fields = self.fields
+        return self.adapter.validate_python([dict(zip(fields, row)) for row in result])
+
+    def response(self, result: Iterable[tuple], headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+        return FastJSONResponse(self.rows(result), headers=headers)
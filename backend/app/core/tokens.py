@@ -0,0 +1,96 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+import os
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from ..models.models import RefreshToken, User
+
+load_dotenv()
+
+# Refresh tokens are opaque random strings; only their SHA-256 is stored, so a
+# lookup is one indexed equality probe instead of a bcrypt verify.
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def issue_refresh_token(db: AsyncSession, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None) -> str:
+    """Add a new refresh token row to the session and return the token; the caller commits"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=_hash_token(token),
+        family_id=family_id or uuid.uuid4(),
+        user_id=user_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+async def _revoke_family(db: AsyncSession, family_id: uuid.UUID) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[User, str]:
+    """Exchange a live refresh token for a new one in the same family.
+
+    Presenting a token that was already rotated or revoked means it leaked or was
+    replayed, so the whole family is revoked and the caller must log in again.
+    """
+    now = datetime.now(timezone.utc)
+    row = (await db.execute(
+        select(RefreshToken, User, RefreshToken.expires_at > now)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == _hash_token(token))
+        .with_for_update(of=RefreshToken)
+    )).first()
+    if row is None:
+        raise _invalid_refresh_token()
+
+    stored, user, live = row
+    if stored.revoked_at is not None:
+        await _revoke_family(db, stored.family_id)
+        await db.commit()
+        raise _invalid_refresh_token()
+    if not live:
+        raise _invalid_refresh_token()
+
+    stored.revoked_at = now
+    new_token = issue_refresh_token(db, user.id, stored.family_id)
+    await db.commit()
+    return user, new_token
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
+    """Revoke the family a refresh token belongs to; unknown tokens are ignored"""
+    family_id = (await db.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash_token(token))
+    )).scalar()
+    if family_id is not None:
+        await _revoke_family(db, family_id)
+        await db.commit()
+
+
+async def purge_refresh_tokens(db: AsyncSession, user_id: uuid.UUID) -> None:
+    """Delete every refresh token of a user; the caller commits"""
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
@@ -0,0 +1,124 @@
+import hashlib
+import uuid
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import func, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import User, UserDataVersion, WalletDataVersion
+from .access import accessible_wallet_ids
+from .currency import rates
+from .database import get_async_db
+from .rollups import UPSERT_INSERTS
+from .security import get_current_user
+
+
+async def _bump(db: AsyncSession, model, key: str, ids) -> None:
+    table = model.__table__
+    stmt = UPSERT_INSERTS[db.bind.dialect.name](table)
+    if isinstance(ids, (list, tuple, set, frozenset)):
+        if not ids:
+            return
+        # Sorted, so writers bumping overlapping sets lock the rows in the same order
+        stmt = stmt.values([{key: id_, "version": 1} for id_ in sorted(set(ids))])
+    else:
+        ids = ids.subquery()
+        # SQLite needs a WHERE to tell the upsert's ON CONFLICT from a join constraint
+        stmt = stmt.from_select([key, "version"], select(ids.c[0], literal(1)).where(true()))
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c[key]],
+        set_={"version": table.c.version + 1}
+    ))
+
+
+async def bump_users(db: AsyncSession, user_ids) -> None:
+    """Invalidate the list ETags of the given users (ids or a selectable of ids).
+
+    For writes to a user's own goals, budgets and recurring expenses. Call it in the
+    transaction of the write, right before commit, so the row locks are held as
+    briefly as possible.
+    """
+    await _bump(db, UserDataVersion, "user_id", user_ids)
+
+
+async def bump_wallets(db: AsyncSession, wallet_ids) -> None:
+    """Invalidate the list ETags of everyone who can see the given wallets (ids or a selectable of ids).
+
+    One row per wallet rather than one per member, so writers to a shared wallet
+    contend on that row alone, right before they commit.
+    """
+    await _bump(db, WalletDataVersion, "wallet_id", wallet_ids)
+
+
+def _list_etag(user_id: uuid.UUID, version, request: Request) -> str:
+    # The query string selects the page and filters, so it is part of the representation
+    key = f"{user_id}:{version}:{request.url.path}?{sorted(request.query_params.multi_items())}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 specifies for If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Let browsers keep the list but revalidate it on every use; shared caches must not store it"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def _data_version(db: AsyncSession, user_id: uuid.UUID) -> str:
+    """The user's own version and the id and version of every wallet they can see.
+
+    The wallet ids are part of it, so gaining or losing a wallet changes it without a bump.
+    """
+    wallets = accessible_wallet_ids(user_id).subquery()
+    own = select(UserDataVersion.version).where(UserDataVersion.user_id == user_id).scalar_subquery()
+    rows = (await db.execute(
+        select(func.coalesce(own, 0), wallets.c.id, func.coalesce(WalletDataVersion.version, 0))
+        .select_from(User)
+        .outerjoin(wallets, true())
+        .outerjoin(WalletDataVersion, WalletDataVersion.wallet_id == wallets.c.id)
+        .where(User.id == user_id)
+        .order_by(wallets.c.id)
+    )).all()
+    return f"{rows[0][0]}:" + ",".join(f"{wallet_id}={version}" for _, wallet_id, version in rows if wallet_id)
+
+
+def _not_modified(request: Request, etag: str) -> str:
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+    return etag
+
+
+async def list_etag(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+) -> str:
+    """Dependency returning the ETag of a list response, or answering 304 before the list is queried.
+
+    The version is read before the list, so a write landing in between can only make
+    the ETag older than the body, which costs the client one extra full fetch.
+    """
+    version = await _data_version(db, current_user.id)
+    return _not_modified(request, _list_etag(current_user.id, version, request))
+
+
+async def converted_etag(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+) -> str:
+    """list_etag for responses with totals converted at the cached exchange rates.
+
+    Loading rates bumps no data version, so the version of the rates the response
+    will be converted with is part of the key as well.
+    """
+    await rates.ensure_loaded(db)
+    version = await _data_version(db, current_user.id)
+    return _not_modified(request, _list_etag(current_user.id, f"{version}:{rates.version}", request))
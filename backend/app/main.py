@@ -2,9 +2,16 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from typing import List
+import asyncio
 import os
 from dotenv import load_dotenv
-from app.core.database import init_db
+from app.core.database import init_db, async_engine, engine
+from app.core.currency import EXCHANGE_RATES_FILE, load_rates_file
+from app.core.security import password_executor
+from app.core.ledger import LEDGER_COMPACTION_INTERVAL_SECONDS, run_compaction
+from app.core.recurring import RECURRING_INTERVAL_SECONDS, run_scheduler
+from app.core import querystats
+from app.core.metrics import MetricsMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -15,10 +22,33 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize database tables on startup
+# Initialize database tables, load exchange rates and start wallet ledger compaction and
+# recurring expenses on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    if EXCHANGE_RATES_FILE:
+        with engine.begin() as conn:
+            load_rates_file(conn, EXCHANGE_RATES_FILE)
+    app.state.ledger_compaction = (
+        asyncio.create_task(run_compaction(LEDGER_COMPACTION_INTERVAL_SECONDS))
+        if LEDGER_COMPACTION_INTERVAL_SECONDS > 0 else None
+    )
+    app.state.recurring_scheduler = (
+        asyncio.create_task(run_scheduler(RECURRING_INTERVAL_SECONDS))
+        if RECURRING_INTERVAL_SECONDS > 0 else None
+    )
+
+# Stop background work and release pooled async connections and password hashing threads on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.ledger_compaction is not None:
+        app.state.ledger_compaction.cancel()
+    if app.state.recurring_scheduler is not None:
+        app.state.recurring_scheduler.cancel()
+    await async_engine.dispose()
+    if password_executor is not None:
+        password_executor.shutdown(wait=False)
 
 # CORS middleware configuration
 app.add_middleware(
@@ -29,6 +59,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request statement counts and database time in a Server-Timing header (opt-in)
+if querystats.QUERY_STATS_ENABLED:
+    querystats.install(async_engine.sync_engine)
+    app.add_middleware(querystats.QueryStatsMiddleware)
+
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -38,10 +73,20 @@ async def root():
     return {"message": "Welcome to Expense Tracker API"}
 
 # Import and include routers
-from app.routers import auth, wallets, expenses, goals, budgets
+from app.routers import auth, wallets, expenses, goals, budgets, analytics, dashboard, recurring, internal
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(wallets.router, prefix="/api/wallets", tags=["Wallets"])
 app.include_router(expenses.router, prefix="/api/expenses", tags=["Expenses"])
 app.include_router(goals.router, prefix="/api/goals", tags=["Goals"])
 app.include_router(budgets.router, prefix="/api/budgets", tags=["Budgets"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(recurring.router, prefix="/api/recurring-expenses", tags=["Recurring Expenses"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+
+# Operational endpoints and the request metrics they serve are opt-in; keep them off
+# anything reachable from the internet
+if os.getenv("ENABLE_INTERNAL_ENDPOINTS", "false").lower() == "true":
+    app.include_router(internal.router, prefix="/internal", tags=["Internal"], include_in_schema=False)
+    # Outermost, so the recorded latency covers every other middleware
+    app.add_middleware(MetricsMiddleware)
@@ -1,22 +1,35 @@
 import uuid
-from sqlalchemy import Boolean, Column, String, Float, DateTime, ForeignKey, Table, JSON
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, String, Float, Integer, BigInteger, Date, DateTime, ForeignKey, Table, JSON, Index, Uuid, select
+from sqlalchemy.sql import func, literal_column
+from sqlalchemy.orm import relationship, column_property
 from app.core.database import Base
 
 # Association table for wallet sharing
 wallet_shares = Table(
     'wallet_shares',
     Base.metadata,
-    Column('wallet_id', UUID(as_uuid=True), ForeignKey('wallets.id'), primary_key=True),
-    Column('user_id', UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    Column('wallet_id', Uuid(as_uuid=True), ForeignKey('wallets.id'), primary_key=True),
+    Column('user_id', Uuid(as_uuid=True), ForeignKey('users.id'), primary_key=True),
+    # The primary key leads with wallet_id; lookups by member need their own index
+    Index('ix_wallet_shares_user_id_wallet_id', 'user_id', 'wallet_id')
 )
 
+def new_row(model, **values):
+    """Build a new row with its id and updated_at chosen up front.
+
+    Columns the ORM already holds a value for are sent as INSERT parameters, so
+    with eager_defaults only genuinely server-generated ones come back through
+    RETURNING, and create handlers can respond from the object without a
+    follow-up SELECT.
+    """
+    values.setdefault("id", uuid.uuid4())
+    values.setdefault("updated_at", None)
+    return model(**values)
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
@@ -29,13 +42,14 @@ class User(Base):
 class Wallet(Base):
     __tablename__ = "wallets"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     type = Column(String, default="personal")  # personal, shared, business
-    balance = Column(Float, default=0.0)
-    currency = Column(String, default="USD")
+    # balance is computed from the ledger; see the column_property after WalletBalanceSnapshot
+    # Same default as the API schema; totals across wallets convert through exchange_rates
+    currency = Column(String, default="INR")
     description = Column(String, nullable=True)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -44,16 +58,37 @@ class Wallet(Base):
     shared_with = relationship("User", secondary=wallet_shares, back_populates="shared_wallets")
     expenses = relationship("Expense", back_populates="wallet")
 
+    # Fetch server-generated columns with INSERT/UPDATE ... RETURNING instead of a reload
+    __mapper_args__ = {"eager_defaults": True}
+
+def _weighted_tsvector(column, weight: str):
+    # Literals rather than bound parameters, so queries match the index expression exactly
+    return func.setweight(
+        func.to_tsvector(literal_column("'simple'"), func.coalesce(column, literal_column("''"))),
+        literal_column(f"'{weight}'")
+    )
+
+def _search_document(description, category):
+    """Full-text document of an expense: description words rank above the category.
+
+    The 'simple' configuration does not stem, so merchant names match as written.
+    """
+    return _weighted_tsvector(description, "A").op("||")(_weighted_tsvector(category, "B"))
+
 class Expense(Base):
     __tablename__ = "expenses"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     category = Column(String, nullable=True)
     date = Column(DateTime(timezone=True), server_default=func.now())
-    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    # Set on expenses materialized from a recurring rule; with date it identifies the occurrence
+    recurring_expense_id = Column(
+        Uuid(as_uuid=True), ForeignKey("recurring_expenses.id", ondelete="SET NULL"), nullable=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -61,11 +96,157 @@ class Expense(Base):
     wallet = relationship("Wallet", back_populates="expenses")
     user = relationship("User")
 
+    __table_args__ = (
+        # Serves wallet_id lookups, date range filters per wallet and the (date, id) keyset order
+        Index('ix_expenses_wallet_id_date_id', 'wallet_id', 'date', 'id'),
+        # Serves /api/expenses/search; GIN is PostgreSQL-only, elsewhere search scans
+        Index('ix_expenses_search', _search_document(description, category), postgresql_using='gin')
+            .ddl_if(dialect='postgresql'),
+        # One expense per rule and occurrence, however many scheduler runs race on it
+        Index('ix_expenses_recurring_expense_id_date', 'recurring_expense_id', 'date', unique=True),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+# The searched expression; it must stay identical to the one ix_expenses_search indexes
+EXPENSE_SEARCH_DOCUMENT = _search_document(Expense.__table__.c.description, Expense.__table__.c.category)
+
+
+class SpendingRollup(Base):
+    """Expense count and total per wallet, creator, category and calendar month (UTC).
+
+    Maintained in the same transaction as every expense write by app.core.rollups
+    and rebuilt from scratch by scripts/rebuild_spending_rollups.py.
+    """
+    __tablename__ = "spending_rollups"
+
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id"), primary_key=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    # Uncategorized expenses are stored under '' so the key stays NOT NULL
+    category = Column(String, primary_key=True, default="")
+    month = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+
+class ExchangeRate(Base):
+    """Units of the base currency (BASE_CURRENCY) that one unit of currency was worth on a date.
+
+    Loaded from a local file by scripts/load_exchange_rates.py and read through
+    the in-memory cache in app.core.currency.
+    """
+    __tablename__ = "exchange_rates"
+
+    currency = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Float, nullable=False)
+
+
+class WalletLedgerEntry(Base):
+    """A signed change to a wallet's balance. Entries are only ever inserted."""
+    __tablename__ = "wallet_ledger"
+
+    # Monotonic position; snapshots record the last position they include
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Float, nullable=False)
+    kind = Column(String, nullable=False)  # opening, deposit, expense, expense_update, expense_delete, import, batch, recurring, goal
+    # The expense or goal the entry was written for, if any
+    reference_id = Column(Uuid(as_uuid=True), nullable=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Serves the "entries after the latest snapshot" sum for one wallet
+        Index('ix_wallet_ledger_wallet_id_id', 'wallet_id', 'id'),
+    )
+
+
+class WalletBalanceSnapshot(Base):
+    """A wallet's balance including every ledger entry up to last_entry_id"""
+    __tablename__ = "wallet_balance_snapshots"
+
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id", ondelete="CASCADE"), primary_key=True)
+    last_entry_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    balance = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+def _latest_snapshot(column):
+    return select(column)\
+        .where(WalletBalanceSnapshot.wallet_id == Wallet.id)\
+        .order_by(WalletBalanceSnapshot.last_entry_id.desc())\
+        .limit(1)\
+        .correlate_except(WalletBalanceSnapshot)\
+        .scalar_subquery()
+
+# Current balance: the latest snapshot plus the ledger entries written after it
+Wallet.balance = column_property(
+    func.coalesce(_latest_snapshot(WalletBalanceSnapshot.balance), 0.0) +
+    select(func.coalesce(func.sum(WalletLedgerEntry.amount), 0.0))
+        .where(
+            WalletLedgerEntry.wallet_id == Wallet.id,
+            WalletLedgerEntry.id > func.coalesce(_latest_snapshot(WalletBalanceSnapshot.last_entry_id), 0)
+        )
+        .correlate_except(WalletLedgerEntry)
+        .scalar_subquery()
+)
+
+
+
+class UserDataVersion(Base):
+    """Bumped by writes to a user's own goals, budgets and recurring expenses; drives their list ETags.
+
+    Kept out of users so hot writes do not lock rows that authentication reads.
+    A user without a row is at version 0.
+    """
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+class WalletDataVersion(Base):
+    """Bumped by writes to a wallet or its expenses; every member's list ETags include it.
+
+    A wallet without a row is at version 0.
+    """
+    __tablename__ = "wallet_data_versions"
+
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+class RecurringExpense(Base):
+    """A rule that creates an expense every interval days, weeks, months or years.
+
+    Occurrences are materialized by app.core.recurring; occurrence_count of them
+    have been processed so far and next_occurrence is the date of the next one.
+    """
+    __tablename__ = "recurring_expenses"
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    amount = Column(Float, nullable=False)
+    description = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    frequency = Column(String, nullable=False)  # daily, weekly, monthly, yearly
+    interval = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+    next_occurrence = Column(Date, nullable=False, index=True)
+    occurrence_count = Column(Integer, nullable=False, default=0)
+    is_active = Column(Boolean, nullable=False, default=True)
+    wallet_id = Column(Uuid(as_uuid=True), ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class Goal(Base):
     __tablename__ = "goals"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     target_amount = Column(Float, nullable=False)
@@ -73,24 +254,45 @@ class Goal(Base):
     deadline = Column(DateTime(timezone=True), nullable=True)
     category = Column(String, nullable=True)
     is_completed = Column(Boolean, default=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     user = relationship("User")
 
+    __mapper_args__ = {"eager_defaults": True}
+
 class Budget(Base):
     __tablename__ = "budgets"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     category = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     user = relationship("User")
+
+    __table_args__ = (
+        Index('ix_budgets_user_id_category_start_date', 'user_id', 'category', 'start_date'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # SHA-256 of the opaque token handed to the client; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Every token rotated from the same login shares a family, so reuse of a
+    # rotated token can revoke the whole chain
+    family_id = Column(Uuid(as_uuid=True), nullable=False, index=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from typing import Optional
+from datetime import datetime, date, time, timedelta, timezone
+import uuid
+
+from ..models.models import Expense, SpendingRollup, User, Wallet
+from ..schemas.schemas import SpendingSummary
+from ..core.database import get_async_db
+from ..core.security import get_current_user
+from ..core.access import WalletAccess, get_wallet_access, accessible_wallet_ids
+from ..core.currency import BASE_CURRENCY, rates
+from ..core.rollups import day_bucket
+
+router = APIRouter()
+
+def _shift_month(day: date, months: int) -> date:
+    """Return the first day of the month `months` away from `day`"""
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+def _as_date(value) -> date:
+    """Some drivers return dates grouped in SQL as datetimes"""
+    return value.date() if isinstance(value, datetime) else value
+
+def _utc_midnight(day: date) -> datetime:
+    """A bare date bound to a timestamptz would be midnight in the host's time zone"""
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+def _series(totals, periods):
+    """Zero-fill period -> total over the given periods"""
+    return [{"period": period, "total": totals.get(period, 0.0)} for period in periods]
+
+@router.get("/", response_model=SpendingSummary)
+async def get_spending_summary(
+    wallet_id: Optional[uuid.UUID] = None,
+    months: int = Query(6, ge=1, le=60),
+    currency: str = Query(BASE_CURRENCY, min_length=1, description="Currency the totals are reported in"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
+):
+    """Aggregate spending by category, by day of the current month and by month.
+
+    Category and monthly figures come from spending_rollups, so they cost one row
+    per wallet, creator, category and month rather than one per expense. Every
+    aggregate is also grouped by wallet currency and converted to `currency` once
+    per group, at the rate of the first day of its month, so the daily series adds
+    up to the month's total; spend in wallet currencies without rates is left out
+    and listed in unconverted_currencies.
+    """
+    currency = currency.upper()
+    await rates.ensure_loaded(db)
+    if not rates.knows(currency):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No exchange rates for {currency}"
+        )
+
+    if wallet_id is not None:
+        await access.require(wallet_id)
+        visible = Expense.wallet_id == wallet_id
+        visible_rollups = SpendingRollup.wallet_id == wallet_id
+    else:
+        wallet_ids = accessible_wallet_ids(current_user.id)
+        visible = Expense.wallet_id.in_(wallet_ids)
+        visible_rollups = SpendingRollup.wallet_id.in_(wallet_ids)
+
+    # Category totals over the whole history
+    category_rows = (await db.execute(
+        select(
+            SpendingRollup.category, Wallet.currency, SpendingRollup.month,
+            func.sum(SpendingRollup.total), func.sum(SpendingRollup.count)
+        )
+        .join(Wallet, Wallet.id == SpendingRollup.wallet_id)
+        .where(visible_rollups)
+        .group_by(SpendingRollup.category, Wallet.currency, SpendingRollup.month)
+    )).all()
+    category_totals, unconverted = rates.convert_groups(
+        ((category, wallet_currency, month, total) for category, wallet_currency, month, total, _ in category_rows),
+        currency
+    )
+    category_counts = defaultdict(int)
+    for category, wallet_currency, _, _, count in category_rows:
+        if rates.knows(wallet_currency):
+            category_counts[category] += int(count)
+
+    by_category = sorted(
+        (
+            {"category": category or None, "total": total, "count": category_counts[category]}
+            for category, total in category_totals.items()
+        ),
+        key=lambda item: item["total"],
+        reverse=True
+    )
+
+    today = datetime.utcnow().date()
+    month_start = today.replace(day=1)
+    next_month_start = _shift_month(month_start, 1)
+
+    # Daily totals for the current month
+    day = day_bucket(Expense.date, db.bind.dialect.name)
+    daily_rows = (await db.execute(
+        select(day, Wallet.currency, func.sum(Expense.amount))
+        .join(Wallet, Wallet.id == Expense.wallet_id)
+        .where(visible, Expense.date >= _utc_midnight(month_start), Expense.date < _utc_midnight(next_month_start))
+        .group_by(day, Wallet.currency)
+    )).all()
+    daily, unconverted_daily = rates.convert_groups(
+        ((_as_date(period), wallet_currency, month_start, total) for period, wallet_currency, total in daily_rows),
+        currency
+    )
+    days = [month_start + timedelta(days=i) for i in range((next_month_start - month_start).days)]
+
+    # Monthly totals for the trailing window, oldest first; always cover last month
+    window = max(months, 2)
+    trend_start = _shift_month(month_start, -(window - 1))
+    monthly_rows = (await db.execute(
+        select(SpendingRollup.month, Wallet.currency, func.sum(SpendingRollup.total))
+        .join(Wallet, Wallet.id == SpendingRollup.wallet_id)
+        .where(visible_rollups, SpendingRollup.month >= trend_start, SpendingRollup.month < next_month_start)
+        .group_by(SpendingRollup.month, Wallet.currency)
+    )).all()
+    monthly_totals, unconverted_monthly = rates.convert_groups(
+        ((month, wallet_currency, month, total) for month, wallet_currency, total in monthly_rows),
+        currency
+    )
+    monthly = _series(monthly_totals, [_shift_month(trend_start, i) for i in range(window)])
+
+    return {
+        "currency": currency,
+        "total": sum(item["total"] for item in by_category),
+        "current_month_total": monthly[-1]["total"],
+        "last_month_total": monthly[-2]["total"],
+        "by_category": by_category,
+        "daily": _series(daily, days),
+        "monthly": monthly[-months:],
+        "unconverted_currencies": sorted(unconverted | unconverted_daily | unconverted_monthly),
+    }
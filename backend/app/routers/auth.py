@@ -1,31 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from ..models.models import User
-from ..schemas.schemas import User as UserSchema, UserCreate, Token
-from ..core.database import get_db
+from ..schemas.schemas import User as UserSchema, UserCreate, Token, RefreshRequest
+from ..core.database import get_async_db
+from ..core.access import accessible_wallet_ids
+from ..core.versioning import bump_wallets
 from ..core.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_current_user
+    get_current_user,
+    invalidate_principal
+)
+from ..core.tokens import (
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_token,
+    purge_refresh_tokens
 )
 
 router = APIRouter()
 
+def _token_response(user: User, refresh_token: str) -> dict:
+    """Access token for a user plus the refresh token that can renew it"""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.email}, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds()),
+    }
+
 @router.post("/register", response_model=UserSchema)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -33,30 +56,38 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """OAuth2 compatible token login, get an access token for future requests"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalars().first()
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    return _token_response(user, refresh_token)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    user, refresh_token = await rotate_refresh_token(db, body.refresh_token)
+    return _token_response(user, refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke a refresh token and every token rotated from the same login"""
+    await revoke_refresh_token(db, body.refresh_token)
 
 @router.get("/me", response_model=UserSchema)
 async def read_users_me(current_user: User = Depends(get_current_user)):
@@ -66,12 +97,17 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 
 @router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete the current user's account.
     """
-    db.delete(current_user)
-    db.commit()
+    email = current_user.email
+    await purge_refresh_tokens(db, current_user.id)
+    # Whoever shares a wallet with this user sees its membership change
+    await bump_wallets(db, accessible_wallet_ids(current_user.id))
+    await db.delete(current_user)
+    await db.commit()
+    invalidate_principal(email)
     return {"message": "Account deleted successfully"}
@@ -1,56 +1,147 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from ..models.models import Budget, User
-from ..schemas.schemas import Budget as BudgetSchema, BudgetCreate, BudgetUpdate
-from ..core.database import get_db
+from ..models.models import Budget, Expense, User, Wallet, new_row
+from ..schemas.schemas import Budget as BudgetSchema, BudgetCreate, BudgetUpdate, BudgetUtilization
+from ..core.database import get_async_db
 from ..core.security import get_current_user
+from ..core.serialization import RowSerializer
+from ..core.versioning import bump_users, cache_headers, list_etag
+from ..core.access import accessible_wallet_ids
+from ..core.currency import BASE_CURRENCY, rate_on, rates
+from ..core.rollups import day_bucket
 
 router = APIRouter()
 
+budget_rows = RowSerializer(BudgetSchema, Budget)
+
 @router.post("/", response_model=BudgetSchema, status_code=status.HTTP_201_CREATED)
-def create_budget(
+async def create_budget(
     budget: BudgetCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new budget for the current user"""
-    db_budget = Budget(
+    db_budget = new_row(
+        Budget,
         **budget.dict(),
         user_id=current_user.id,
         created_at=datetime.utcnow()
     )
     db.add(db_budget)
-    db.commit()
-    db.refresh(db_budget)
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return db_budget
 
 @router.get("/", response_model=List[BudgetSchema])
-def list_budgets(
+async def list_budgets(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(list_etag)
 ):
     """List all budgets for the current user"""
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).offset(skip).limit(limit).all()
-    return budgets
+    return budget_rows.response(await db.execute(
+        budget_rows.select().where(Budget.user_id == current_user.id).offset(skip).limit(limit)
+    ), headers=cache_headers(etag))
+
+def _as_date(value) -> date:
+    """Some drivers return dates aggregated in SQL as datetimes or strings"""
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+async def budget_utilization(db: AsyncSession, user_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[BudgetUtilization]:
+    """The user's budgets with how much of each has been spent, in the base currency"""
+    await rates.ensure_loaded(db)
+    page = select(Budget.id).where(Budget.user_id == user_id).offset(skip).limit(limit).subquery()
+    day = day_bucket(Expense.date, db.bind.dialect.name)
+    in_budget = and_(
+        Expense.category == Budget.category,
+        Expense.date >= Budget.start_date,
+        Expense.date <= Budget.end_date,
+        Expense.wallet_id.in_(accessible_wallet_ids(user_id))
+    )
+
+    # One aggregate over the page of budgets LEFT JOIN expenses in the budget's category
+    # and window, restricted to expenses in wallets the user can see. Spend is grouped
+    # by wallet currency, with the first and last day it falls on.
+    query = select(Budget, Wallet.currency, func.min(day), func.max(day), func.sum(Expense.amount))\
+        .join(page, page.c.id == Budget.id)\
+        .outerjoin(Expense, in_budget)\
+        .outerjoin(Wallet, Wallet.id == Expense.wallet_id)\
+        .group_by(Budget.id, Wallet.currency)
+    rows = (await db.execute(query)).all()
+
+    budgets = {budget.id: budget for budget, _, _, _, _ in rows}
+    spent = defaultdict(float)
+    unconverted = defaultdict(set)
+    varying = []
+    for budget, currency, first, last, total in rows:
+        if first is None:
+            continue
+        if not rates.knows(currency):
+            unconverted[budget.id].add(currency.upper())
+            continue
+        rate = rates.single_rate(currency, _as_date(first), _as_date(last))
+        if rate is None:
+            varying.append((budget.id, currency))
+        else:
+            spent[budget.id] += float(total) * rate
+
+    # Groups whose rate changes between those days convert per expense in SQL
+    if varying:
+        converted = await db.execute(
+            select(Budget.id, func.sum(Expense.amount * rate_on(Wallet.currency, day)))
+            .join(Expense, in_budget)
+            .join(Wallet, Wallet.id == Expense.wallet_id)
+            .where(tuple_(Budget.id, Wallet.currency).in_(varying))
+            .group_by(Budget.id)
+        )
+        for budget_id, total in converted:
+            spent[budget_id] += float(total)
+
+    utilization = []
+    for budget in budgets.values():
+        budget_spent = spent[budget.id]
+        utilization.append(BudgetUtilization(
+            **BudgetSchema.model_validate(budget).model_dump(),
+            currency=BASE_CURRENCY,
+            spent=budget_spent,
+            remaining=budget.amount - budget_spent,
+            percent_used=round(budget_spent / budget.amount * 100, 2) if budget.amount else 0.0,
+            unconverted_currencies=sorted(unconverted[budget.id])
+        ))
+    return utilization
+
+@router.get("/utilization", response_model=List[BudgetUtilization])
+async def list_budget_utilization(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List the current user's budgets with how much of each has been spent"""
+    return await budget_utilization(db, current_user.id, skip, limit)
 
 @router.get("/{budget_id}", response_model=BudgetSchema)
-def get_budget(
+async def get_budget(
     budget_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific budget by ID"""
-    db_budget = db.query(Budget).filter(
+    db_budget = (await db.execute(select(Budget).where(
         Budget.id == budget_id,
         Budget.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not db_budget:
         raise HTTPException(
@@ -60,17 +151,23 @@ def get_budget(
     return db_budget
 
 @router.put("/{budget_id}", response_model=BudgetSchema)
-def update_budget(
+async def update_budget(
     budget_id: uuid.UUID,
     budget_update: BudgetUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a budget"""
-    db_budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
+    update_data = budget_update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.utcnow()
+
+    # One UPDATE ... RETURNING both checks ownership and loads the result
+    db_budget = (await db.execute(
+        update(Budget)
+        .where(Budget.id == budget_id, Budget.user_id == current_user.id)
+        .values(**update_data)
+        .returning(Budget)
+    )).scalars().first()
     
     if not db_budget:
         raise HTTPException(
@@ -78,34 +175,29 @@ def update_budget(
             detail="Budget not found"
         )
     
-    update_data = budget_update.dict(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-    
-    for field, value in update_data.items():
-        setattr(db_budget, field, value)
-    
-    db.commit()
-    db.refresh(db_budget)
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return db_budget
 
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_budget(
+async def delete_budget(
     budget_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a budget"""
-    db_budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
+    deleted_id = (await db.execute(
+        delete(Budget)
+        .where(Budget.id == budget_id, Budget.user_id == current_user.id)
+        .returning(Budget.id)
+    )).scalar()
     
-    if not db_budget:
+    if not deleted_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Budget not found"
         )
     
-    db.delete(db_budget)
-    db.commit()
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return None
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import Goal, User
+from ..schemas.schemas import Dashboard
+from ..core.database import get_async_db, begin_read_only_snapshot
+from ..core.security import get_current_user
+from ..core.versioning import cache_headers, converted_etag
+from .budgets import budget_utilization
+from .expenses import expense_rows, newest_expenses
+from .goals import goal_rows
+from .wallets import visible_wallets
+
+router = APIRouter()
+
+@router.get("/", response_model=Dashboard)
+async def get_dashboard(
+    response: Response,
+    expenses: int = Query(20, ge=1, le=100, description="How many of the most recent expenses to include"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(converted_etag)
+):
+    """Everything the dashboard shows on first paint, read from one consistent snapshot"""
+    await begin_read_only_snapshot(db)
+
+    wallets = (await db.execute(visible_wallets(current_user.id))).scalars().all()
+    recent_expenses = expense_rows.rows(await db.execute(
+        newest_expenses(expense_rows.select(), current_user.id, None, db.bind.dialect.name, expenses)
+    ))
+    goals = goal_rows.rows(await db.execute(goal_rows.select().where(Goal.user_id == current_user.id)))
+    budgets = await budget_utilization(db, current_user.id)
+    await db.commit()
+
+    response.headers.update(cache_headers(etag))
+    return {
+        "user": current_user,
+        "wallets": wallets,
+        "recent_expenses": recent_expenses,
+        "goals": goals,
+        "budgets": budgets,
+    }
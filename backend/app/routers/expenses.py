@@ -1,19 +1,181 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import Float, and_, case, cast, func, insert, literal_column, or_, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from collections import defaultdict
+import base64
+import codecs
+import csv
+import io
+import json
+import re
 import uuid
 
-from ..models.models import Expense, Wallet, User, wallet_shares
-from ..schemas.schemas import Expense as ExpenseSchema, ExpenseCreate, ExpenseUpdate
-from ..core.database import get_db
+from ..models.models import EXPENSE_SEARCH_DOCUMENT, Expense, User, new_row
+from ..schemas.schemas import (
+    Expense as ExpenseSchema, ExpenseCreate, ExpenseUpdate, ExpensePage, ExpenseImportResult,
+    ExpenseBatch, ExpenseBatchOperation, ExpenseBatchResult
+)
+from ..core.database import get_async_db, AsyncSessionLocal
 from ..core.security import get_current_user
+from ..core.access import WalletAccess, get_wallet_access, accessible_wallet_ids
+from ..core.rollups import RollupDeltas
+from ..core.serialization import FastJSONResponse, RowSerializer
+from ..core.versioning import bump_wallets, cache_headers, list_etag
+from ..core import ledger
 
 router = APIRouter(
     tags=["expenses"],
     responses={404: {"description": "Not found"}},
 )
 
+# Bulk import settings
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_IMPORT_ERRORS = 1000
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Streaming export settings; the columns double as a CSV header that /import accepts
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "date", "amount", "category", "description", "wallet_id", "user_id", "created_at", "updated_at"]
+
+# Batch mutation settings
+MAX_BATCH_OPERATIONS = 1000
+# Fields an update may leave out but not set to null
+NON_NULLABLE_UPDATE_FIELDS = ("amount", "wallet_id", "date")
+
+# Full-text search settings; terms are runs of word characters, matched as word prefixes
+MAX_SEARCH_TERMS = 8
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+# List endpoints read plain rows and encode them directly instead of hydrating Expense objects
+expense_rows = RowSerializer(ExpenseSchema, Expense)
+
+def _encode_cursor(expense: dict) -> str:
+    """Encode the (date, id) sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps([expense["date"].isoformat(), str(expense["id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    """Decode a cursor produced by _encode_cursor back into its (date, id) sort key"""
+    try:
+        raw_date, raw_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw_date), uuid.UUID(raw_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _encode_search_cursor(rank: float, expense: dict) -> str:
+    """Encode the (rank, date, id) sort key of the last search result on a page as an opaque cursor"""
+    raw = json.dumps([rank, expense["date"].isoformat(), str(expense["id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_search_cursor(cursor: str):
+    """Decode a cursor produced by _encode_search_cursor back into its (rank, date, id) sort key"""
+    try:
+        rank, raw_date, raw_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), datetime.fromisoformat(raw_date), uuid.UUID(raw_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _search_match(terms: List[str], dialect: str):
+    """(condition, rank) for expenses containing every term; description hits rank above category hits"""
+    if dialect == "postgresql":
+        # Served by the ix_expenses_search GIN index; terms are word characters only, so safe in a tsquery
+        query = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        return EXPENSE_SEARCH_DOCUMENT.op("@@")(query), func.ts_rank(EXPENSE_SEARCH_DOCUMENT, query)
+
+    # Unindexed substring match for embedded databases, weighted like ts_rank's A and B weights
+    description = func.lower(func.coalesce(Expense.description, ""))
+    category = func.lower(func.coalesce(Expense.category, ""))
+    condition = and_(*(
+        or_(description.contains(term, autoescape=True), category.contains(term, autoescape=True))
+        for term in terms
+    ))
+    rank = sum(
+        case((description.contains(term, autoescape=True), 1.0), else_=0.4)
+        for term in terms
+    )
+    return condition, cast(rank, Float)
+
+def _filter_expenses(
+    query,
+    user_id: uuid.UUID,
+    wallet_id: Optional[uuid.UUID],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    category: Optional[str]
+):
+    """Apply the list_expenses filters and wallet visibility rules to a select.
+
+    Access to an explicit wallet_id must already have been checked by the caller.
+    """
+    if wallet_id is not None:
+        query = query.where(Expense.wallet_id == wallet_id)
+    else:
+        # Only expenses in wallets the user owns or that are shared with them
+        query = query.where(Expense.wallet_id.in_(accessible_wallet_ids(user_id)))
+    return _filter_expense_fields(query, start_date, end_date, category)
+
+def _filter_expense_fields(
+    query,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    category: Optional[str]
+):
+    """Apply the date range and category filters of the list endpoints to a select"""
+    if start_date:
+        query = query.where(Expense.date >= start_date)
+    if end_date:
+        query = query.where(Expense.date <= end_date)
+    if category:
+        query = query.where(Expense.category == category)
+    return query
+
+def newest_expenses(
+    query,
+    user_id: uuid.UUID,
+    wallet_id: Optional[uuid.UUID],
+    dialect: str,
+    limit: int,
+    offset: int = 0
+):
+    """Restrict a select of expense_rows columns to visible wallets, newest first, one page of it.
+
+    ix_expenses_wallet_id_date_id yields one wallet's rows in (date, id) order, but
+    not the union of several wallets, so across all of a user's wallets PostgreSQL
+    would sort every visible expense to return one page. There, each accessible
+    wallet's newest offset + limit rows are read through a LATERAL join instead,
+    and only those are merged. Access to an explicit wallet_id must already have
+    been checked by the caller.
+    """
+    order = (Expense.date.desc(), Expense.id.desc())
+    if wallet_id is not None or dialect != "postgresql":
+        return _filter_expenses(query, user_id, wallet_id, None, None, None)\
+            .order_by(*order)\
+            .offset(offset)\
+            .limit(limit)
+
+    wallets = accessible_wallet_ids(user_id).subquery()
+    per_wallet = query.where(Expense.wallet_id == wallets.c.id)\
+        .order_by(*order)\
+        .limit(offset + limit)\
+        .lateral()
+    return select(*(per_wallet.c[name] for name in expense_rows.fields))\
+        .select_from(wallets)\
+        .join(per_wallet, true())\
+        .order_by(per_wallet.c.date.desc(), per_wallet.c.id.desc())\
+        .offset(offset)\
+        .limit(limit)
+
 @router.get("/", response_model=List[ExpenseSchema])
 async def list_expenses(
     wallet_id: Optional[uuid.UUID] = None,
@@ -22,90 +184,484 @@ async def list_expenses(
     category: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access),
+    etag: str = Depends(list_etag)
 ):
     """List expenses with optional filtering"""
-    query = db.query(Expense)
-    
-    # Filter by wallet if provided
     if wallet_id is not None:
-        # Verify wallet access
-        wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
-        if not wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found")
-        if wallet.owner_id != current_user.id and current_user.id not in [u.id for u in wallet.shared_with]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this wallet"
-            )
-        query = query.filter(Expense.wallet_id == wallet_id)
-    
-    # Apply additional filters
-    if start_date:
-        query = query.filter(Expense.date >= start_date)
-    if end_date:
-        query = query.filter(Expense.date <= end_date)
-    if category:
-        query = query.filter(Expense.category == category)
-    
-    # If a specific wallet isn't being queried, filter expenses to only those in wallets the user can access.
-    if wallet_id is None:
-        query = query.join(Wallet, Expense.wallet_id == Wallet.id)\
-                     .outerjoin(wallet_shares, Wallet.id == wallet_shares.c.wallet_id)\
-                     .filter(
-                         (Wallet.owner_id == current_user.id) | 
-                         (wallet_shares.c.user_id == current_user.id)
-                     )
-    
-    return query.offset(skip).limit(limit).all()
+        await access.require(wallet_id)
+    query = _filter_expense_fields(expense_rows.select(), start_date, end_date, category)
+    query = newest_expenses(query, access.user.id, wallet_id, db.bind.dialect.name, limit, offset=skip)
+    return expense_rows.response(await db.execute(query), headers=cache_headers(etag))
+
+@router.get("/page", response_model=ExpensePage)
+async def list_expenses_page(
+    wallet_id: Optional[uuid.UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access),
+    etag: str = Depends(list_etag)
+):
+    """List expenses newest first using keyset pagination on (date, id)"""
+    if wallet_id is not None:
+        await access.require(wallet_id)
+    query = _filter_expense_fields(expense_rows.select(), start_date, end_date, category)
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Expense.date, Expense.id) < tuple_(cursor_date, cursor_id))
+
+    # Fetch one extra row to find out whether another page follows
+    query = newest_expenses(query, access.user.id, wallet_id, db.bind.dialect.name, limit + 1)
+    rows = expense_rows.rows(await db.execute(query))
+    items = rows[:limit]
+    next_cursor = _encode_cursor(items[-1]) if len(rows) > limit else None
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor}, headers=cache_headers(etag))
+
+@router.get("/search", response_model=ExpensePage)
+async def search_expenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    wallet_id: Optional[uuid.UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access),
+    etag: str = Depends(list_etag)
+):
+    """Search descriptions and categories, best match first, using keyset pagination on (rank, date, id)"""
+    terms = SEARCH_TERM_PATTERN.findall(q.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+    if wallet_id is not None:
+        await access.require(wallet_id)
+
+    condition, rank = _search_match(terms, db.bind.dialect.name)
+    ranked = rank.label("rank")
+    query = _filter_expenses(
+        expense_rows.select().add_columns(ranked), access.user.id, wallet_id, start_date, end_date, category
+    ).where(condition)
+    if cursor:
+        cursor_rank, cursor_date, cursor_id = _decode_search_cursor(cursor)
+        query = query.where(tuple_(rank, Expense.date, Expense.id) < tuple_(cursor_rank, cursor_date, cursor_id))
+
+    # Fetch one extra row to find out whether another page follows
+    query = query.order_by(ranked.desc(), Expense.date.desc(), Expense.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    items = expense_rows.rows(row[:-1] for row in rows[:limit])
+    next_cursor = _encode_search_cursor(rows[limit - 1][-1], items[-1]) if len(rows) > limit else None
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor}, headers=cache_headers(etag))
+
+def _format_export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+async def _stream_export(query, format: str):
+    """Yield encoded chunks of an export, one per server-side cursor partition"""
+    # The request's session is closed before a streamed body is sent, so use our own
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            async for partition in result.partitions():
+                writer.writerows([_format_export_value(value) for value in row] for row in partition)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            async for partition in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, map(_format_export_value, row)))) + "\n"
+                    for row in partition
+                ).encode()
+
+@router.get("/export")
+async def export_expenses(
+    wallet_id: Optional[uuid.UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    access: WalletAccess = Depends(get_wallet_access)
+):
+    """Stream expenses, oldest first, as CSV or NDJSON with the same filters as list_expenses"""
+    if wallet_id is not None:
+        await access.require(wallet_id)
+    columns = [getattr(Expense, name) for name in EXPORT_COLUMNS]
+    query = _filter_expenses(select(*columns), access.user.id, wallet_id, start_date, end_date, category)
+    query = query.order_by(Expense.date, Expense.id)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses.{format}"'}
+    )
 
 @router.post("/", response_model=ExpenseSchema, status_code=status.HTTP_201_CREATED)
 async def create_expense(
     expense: ExpenseCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Create a new expense"""
     # Verify wallet access
-    wallet = db.query(Wallet).filter(Wallet.id == expense.wallet_id).first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
+    wallet = await access.require(expense.wallet_id, detail="Not authorized to add expenses to this wallet")
     
-    if wallet.owner_id != current_user.id and current_user.id not in [u.id for u in wallet.shared_with]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to add expenses to this wallet"
-        )
-    
-    # Create the expense
-    db_expense = Expense(
+    # Create the expense; the date is fixed here so the rollup month matches the row
+    db_expense = new_row(
+        Expense,
         **expense.dict(),
         user_id=current_user.id
     )
+    if db_expense.date is None:
+        db_expense.date = datetime.now(timezone.utc)
     
     # Update wallet balance
-    wallet.balance -= expense.amount
+    ledger.record(db, wallet.id, -expense.amount, "expense", db_expense.id, current_user.id)
     
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    rollups = RollupDeltas()
+    rollups.add_expense(db_expense)
+    await rollups.apply(db)
+    await bump_wallets(db, [wallet.id])
+    await db.commit()
     return db_expense
 
+async def _iter_lines(request: Request):
+    """Yield (line number, text) for each line of a streamed request body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_no + 1, buffer.rstrip("\r")
+
+async def _iter_csv_rows(lines):
+    """Yield (line number, row dict) from CSV lines; the first record is the header"""
+    header = None
+    pending, pending_line = None, 0
+    async for line_no, line in lines:
+        record = line if pending is None else pending + "\n" + line
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            if pending is None:
+                pending_line = line_no
+            pending = record
+            continue
+        start_line = line_no if pending is None else pending_line
+        pending = None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells mean "not provided" so optional fields fall back to their defaults
+        yield start_line, {name: value for name, value in zip(header, values) if value != ""}
+    if pending is not None:
+        yield pending_line, ValueError("Unterminated quoted field")
+
+async def _iter_ndjson_rows(lines):
+    """Yield (line number, row dict) from newline-delimited JSON"""
+    async for line_no, line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        yield line_no, row
+
+def _validation_message(error: ValidationError) -> str:
+    """Flatten a pydantic error into one line for the import report"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+async def _flush_import_batch(db: AsyncSession, batch: List[dict]) -> None:
+    """Insert the pending rows with one bulk INSERT and empty the batch"""
+    if batch:
+        await db.execute(insert(Expense), batch)
+        batch.clear()
+
+@router.post("/import", response_model=ExpenseImportResult)
+async def import_expenses(
+    request: Request,
+    wallet_id: Optional[uuid.UUID] = Query(None, description="Wallet for rows that do not name one"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
+):
+    """Import expenses from a streamed CSV (text/csv) or NDJSON (application/x-ndjson) body.
+
+    Rows are validated like ExpenseCreate and inserted in batches; invalid rows are
+    reported and skipped. Each affected wallet gets one ledger entry, and the
+    whole import is committed in a single transaction.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in CSV_CONTENT_TYPES:
+        rows = _iter_csv_rows(_iter_lines(request))
+    elif content_type in NDJSON_CONTENT_TYPES:
+        rows = _iter_ndjson_rows(_iter_lines(request))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson"
+        )
+
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    deltas = defaultdict(float)
+    rollups = RollupDeltas()
+    imported_at = datetime.now(timezone.utc)
+
+    async for line_no, row in rows:
+        error = None
+        if isinstance(row, Exception):
+            error = str(row)
+        else:
+            if wallet_id is not None:
+                row.setdefault("wallet_id", wallet_id)
+            try:
+                expense = ExpenseCreate(**row)
+            except ValidationError as e:
+                error = _validation_message(e)
+            else:
+                if not await access.can_access(expense.wallet_id):
+                    error = "Wallet not found or not authorized to add expenses to it"
+
+        if error is not None:
+            failed += 1
+            if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                errors.append({"line": line_no, "error": error})
+            continue
+
+        values = expense.dict(exclude_none=True)
+        values["user_id"] = current_user.id
+        values.setdefault("date", imported_at)
+        batch.append(values)
+        deltas[expense.wallet_id] += expense.amount
+        rollups.add(expense.wallet_id, current_user.id, expense.category, values["date"], expense.amount)
+        imported += 1
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _flush_import_batch(db, batch)
+
+    await _flush_import_batch(db, batch)
+    await rollups.apply(db)
+
+    # One ledger entry per affected wallet
+    for target, delta in deltas.items():
+        ledger.record(db, target, -delta, "import", user_id=current_user.id)
+    if deltas:
+        await bump_wallets(db, list(deltas))
+    await db.commit()
+
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+def _update_fields(expense_update: ExpenseUpdate) -> dict:
+    """The fields an update sets; an explicit null for a non-nullable one is rejected"""
+    update_data = expense_update.dict(exclude_unset=True)
+    for field in NON_NULLABLE_UPDATE_FIELDS:
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{field} cannot be null"
+            )
+    return update_data
+
+async def _apply_batch_operation(
+    operation: ExpenseBatchOperation,
+    expenses: Dict[uuid.UUID, Expense],
+    deltas: Dict[uuid.UUID, float],
+    rollups: RollupDeltas,
+    db: AsyncSession,
+    access: WalletAccess,
+    now: datetime
+) -> Expense:
+    """Apply one batch operation to the session and to the pending balance and rollup deltas.
+
+    Follows the rules of the single-expense endpoints and raises the same
+    HTTPExceptions, or a ValidationError for an invalid create.
+    """
+    current_user = access.user
+    if operation.op == "create":
+        if operation.id is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Creates must not name an id")
+        values = ExpenseCreate(**(operation.expense.dict(exclude_unset=True) if operation.expense else {}))
+        wallet = await access.require(values.wallet_id, detail="Not authorized to add expenses to this wallet")
+        expense = new_row(
+            Expense,
+            **values.dict(),
+            user_id=current_user.id
+        )
+        if expense.date is None:
+            expense.date = now
+        db.add(expense)
+        expenses[expense.id] = expense
+        deltas[wallet.id] -= expense.amount
+        rollups.add_expense(expense)
+        return expense
+
+    expense = expenses.get(operation.id) if operation.id is not None else None
+    if expense is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+    wallet = await access.get(expense.wallet_id)
+
+    if operation.op == "update":
+        if not wallet:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to modify an expense in this wallet"
+            )
+        if expense.user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the creator can update this expense"
+            )
+        update_data = _update_fields(operation.expense) if operation.expense else {}
+        if update_data.get("wallet_id", expense.wallet_id) != expense.wallet_id:
+            await access.require(
+                update_data["wallet_id"],
+                detail="Not authorized to move an expense to the new wallet",
+                not_found_detail="New wallet not found"
+            )
+
+        deltas[expense.wallet_id] += expense.amount
+        rollups.remove_expense(expense)
+        for key, value in update_data.items():
+            setattr(expense, key, value)
+        # A client-side timestamp lets the UPDATEs run as one executemany without RETURNING
+        expense.updated_at = now
+        deltas[expense.wallet_id] -= expense.amount
+        rollups.add_expense(expense)
+        return expense
+
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this expense"
+        )
+    if expense.user_id != current_user.id and wallet.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the creator or wallet owner can delete this expense"
+        )
+    deltas[expense.wallet_id] += expense.amount
+    rollups.remove_expense(expense)
+    del expenses[expense.id]
+    if expense in db.new:
+        # Created earlier in this batch; it never reaches the database
+        db.expunge(expense)
+    else:
+        await db.delete(expense)
+    return expense
+
+@router.post("/batch", response_model=ExpenseBatchResult)
+async def batch_expenses(
+    batch: ExpenseBatch,
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
+):
+    """Apply a list of create, update and delete operations in one transaction.
+
+    Referenced expenses and wallets are each loaded with one query up front, and
+    operations run in order under the rules of the single-expense endpoints.
+    Failed operations are reported and skipped; the rest commit together with
+    one ledger entry per wallet for the net balance change.
+    """
+    operations = batch.operations
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can hold at most {MAX_BATCH_OPERATIONS} operations"
+        )
+
+    expense_ids = {operation.id for operation in operations if operation.id is not None}
+    expenses = {}
+    if expense_ids:
+        expenses = {
+            expense.id: expense
+            for expense in (await db.execute(select(Expense).where(Expense.id.in_(expense_ids)))).scalars()
+        }
+    wallet_ids = {expense.wallet_id for expense in expenses.values()}
+    wallet_ids.update(
+        operation.expense.wallet_id for operation in operations
+        if operation.expense is not None and operation.expense.wallet_id is not None
+    )
+    await access.prefetch(wallet_ids)
+
+    now = datetime.now(timezone.utc)
+    deltas = defaultdict(float)
+    rollups = RollupDeltas()
+    results = []
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation.op, "id": operation.id}
+        try:
+            expense = await _apply_batch_operation(operation, expenses, deltas, rollups, db, access, now)
+        except HTTPException as e:
+            results.append({**result, "ok": False, "error": e.detail})
+        except ValidationError as e:
+            results.append({**result, "ok": False, "error": _validation_message(e)})
+        else:
+            results.append({
+                **result, "ok": True, "id": expense.id,
+                "expense": expense if operation.op != "delete" else None
+            })
+
+    await rollups.apply(db)
+    for wallet_id, delta in deltas.items():
+        if delta:
+            ledger.record(db, wallet_id, delta, "batch", user_id=access.user.id)
+    if deltas:
+        await bump_wallets(db, list(deltas))
+    await db.commit()
+
+    failed = sum(1 for result in results if not result["ok"])
+    return {"applied": len(results) - failed, "failed": failed, "results": results}
+
 @router.get("/{expense_id}", response_model=ExpenseSchema)
 async def get_expense(
     expense_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Get a specific expense by ID"""
-    expense = db.query(Expense).filter(Expense.id == expense_id).first()
+    expense = await db.get(Expense, expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
     # Verify access to the wallet this expense belongs to
-    wallet = db.query(Wallet).filter(Wallet.id == expense.wallet_id).first()
-    if not wallet or (wallet.owner_id != current_user.id and current_user.id not in [u.id for u in wallet.shared_with]):
+    if not await access.can_access(expense.wallet_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this expense"
@@ -118,16 +674,17 @@ async def update_expense(
     expense_id: uuid.UUID,
     expense_update: ExpenseUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Update an existing expense"""
-    db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
+    db_expense = await db.get(Expense, expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
 
     # Verify access to the original wallet
-    original_wallet = db.query(Wallet).filter(Wallet.id == db_expense.wallet_id).first()
-    if not original_wallet or (original_wallet.owner_id != current_user.id and current_user.id not in [u.id for u in original_wallet.shared_with]):
+    original_wallet = await access.get(db_expense.wallet_id)
+    if not original_wallet:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to modify an expense in this wallet"
@@ -140,37 +697,43 @@ async def update_expense(
             detail="Only the creator can update this expense"
         )
 
-    update_data = expense_update.dict(exclude_unset=True)
+    update_data = _update_fields(expense_update)
+    rollups = RollupDeltas()
+    rollups.remove_expense(db_expense)
     
     # Handle wallet change
     if 'wallet_id' in update_data and update_data['wallet_id'] != db_expense.wallet_id:
         # Verify access to the new wallet
-        new_wallet = db.query(Wallet).filter(Wallet.id == update_data['wallet_id']).first()
-        if not new_wallet:
-            raise HTTPException(status_code=404, detail="New wallet not found")
-        if new_wallet.owner_id != current_user.id and current_user.id not in [u.id for u in new_wallet.shared_with]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to move an expense to the new wallet"
-            )
+        new_wallet = await access.require(
+            update_data['wallet_id'],
+            detail="Not authorized to move an expense to the new wallet",
+            not_found_detail="New wallet not found"
+        )
         
         # Adjust balances
-        original_wallet.balance += db_expense.amount
-        new_wallet.balance -= update_data.get('amount', db_expense.amount)
+        ledger.record(db, original_wallet.id, db_expense.amount, "expense_update", db_expense.id, current_user.id)
+        ledger.record(
+            db, new_wallet.id, -update_data.get('amount', db_expense.amount),
+            "expense_update", db_expense.id, current_user.id
+        )
     
     # Handle amount change in the same wallet
     elif 'amount' in update_data and update_data['amount'] != db_expense.amount:
-        original_wallet.balance += db_expense.amount - update_data['amount']
+        ledger.record(
+            db, original_wallet.id, db_expense.amount - update_data['amount'],
+            "expense_update", db_expense.id, current_user.id
+        )
 
     # Update the expense object
     for key, value in update_data.items():
         setattr(db_expense, key, value)
 
-    db.commit()
-    db.refresh(db_expense)
-    db.refresh(original_wallet)
-    if 'wallet_id' in update_data and update_data['wallet_id'] != db_expense.wallet_id:
-        db.refresh(new_wallet)
+    # Move the expense between rollup buckets; an unchanged key nets to nothing
+    rollups.add_expense(db_expense)
+    await rollups.apply(db)
+    await bump_wallets(db, {original_wallet.id, db_expense.wallet_id})
+
+    await db.commit()
 
     return db_expense
 
@@ -178,16 +741,17 @@ async def update_expense(
 async def delete_expense(
     expense_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Delete an expense"""
-    db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
+    db_expense = await db.get(Expense, expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
     # Verify access to the wallet this expense belongs to
-    wallet = db.query(Wallet).filter(Wallet.id == db_expense.wallet_id).first()
-    if not wallet or (wallet.owner_id != current_user.id and current_user.id not in [u.id for u in wallet.shared_with]):
+    wallet = await access.get(db_expense.wallet_id)
+    if not wallet:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this expense"
@@ -201,8 +765,12 @@ async def delete_expense(
         )
     
     # Update wallet balance
-    wallet.balance += db_expense.amount
+    ledger.record(db, wallet.id, db_expense.amount, "expense_delete", db_expense.id, current_user.id)
     
-    db.delete(db_expense)
-    db.commit()
+    rollups = RollupDeltas()
+    rollups.remove_expense(db_expense)
+    await rollups.apply(db)
+    await db.delete(db_expense)
+    await bump_wallets(db, [wallet.id])
+    await db.commit()
     return {"ok": True}
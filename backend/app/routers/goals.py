@@ -1,59 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import uuid
 from datetime import datetime
 
-from ..models.models import Goal, User, Wallet
+from ..models.models import Goal, User, new_row
 from ..schemas.schemas import Goal as GoalSchema, GoalCreate, GoalUpdate, GoalAddFunds
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..core.security import get_current_user
+from ..core.serialization import RowSerializer
+from ..core.versioning import bump_users, bump_wallets, cache_headers, list_etag
+from ..core.access import WalletAccess, get_wallet_access
+from ..core import ledger
 
 router = APIRouter()
 
+goal_rows = RowSerializer(GoalSchema, Goal)
+
 @router.post("/", response_model=GoalSchema, status_code=status.HTTP_201_CREATED)
-def create_goal(
+async def create_goal(
     goal: GoalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new goal for the current user"""
-    db_goal = Goal(
+    db_goal = new_row(
+        Goal,
         **goal.dict(),
         user_id=current_user.id,
         created_at=datetime.utcnow()
     )
     db.add(db_goal)
-    db.commit()
-    db.refresh(db_goal)
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return db_goal
 
 @router.get("/", response_model=List[GoalSchema])
-def list_goals(
+async def list_goals(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(list_etag)
 ):
     """List all goals for the current user"""
-    goals = db.query(Goal)\
-        .filter(Goal.user_id == current_user.id)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    return goals
+    return goal_rows.response(await db.execute(goal_rows.select()
+        .where(Goal.user_id == current_user.id)
+        .offset(skip)
+        .limit(limit)
+    ), headers=cache_headers(etag))
 
 @router.get("/{goal_id}", response_model=GoalSchema)
-def get_goal(
+async def get_goal(
     goal_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific goal by ID"""
-    db_goal = db.query(Goal).filter(
+    db_goal = (await db.execute(select(Goal).where(
         Goal.id == goal_id,
         Goal.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not db_goal:
         raise HTTPException(
@@ -63,17 +71,23 @@ def get_goal(
     return db_goal
 
 @router.put("/{goal_id}", response_model=GoalSchema)
-def update_goal(
+async def update_goal(
     goal_id: uuid.UUID,
     goal_update: GoalUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a goal"""
-    db_goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
+    update_data = goal_update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.utcnow()
+
+    # One UPDATE ... RETURNING both checks ownership and loads the result
+    db_goal = (await db.execute(
+        update(Goal)
+        .where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        .values(**update_data)
+        .returning(Goal)
+    )).scalars().first()
     
     if not db_goal:
         raise HTTPException(
@@ -81,51 +95,47 @@ def update_goal(
             detail="Goal not found"
         )
     
-    update_data = goal_update.dict(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-    
-    for field, value in update_data.items():
-        setattr(db_goal, field, value)
-    
-    db.commit()
-    db.refresh(db_goal)
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return db_goal
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_goal(
+async def delete_goal(
     goal_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a goal"""
-    db_goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
+    deleted_id = (await db.execute(
+        delete(Goal)
+        .where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        .returning(Goal.id)
+    )).scalar()
     
-    if not db_goal:
+    if not deleted_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
         )
     
-    db.delete(db_goal)
-    db.commit()
+    await bump_users(db, [current_user.id])
+    await db.commit()
     return None
 
 @router.post("/{goal_id}/add_funds", response_model=GoalSchema)
-def add_funds_to_goal(
+async def add_funds_to_goal(
     goal_id: uuid.UUID,
     fund_data: GoalAddFunds,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Add funds to a goal from a wallet"""
     # Get the goal
-    db_goal = db.query(Goal).filter(
+    db_goal = (await db.execute(select(Goal).where(
         Goal.id == goal_id,
         Goal.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     if not db_goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -138,12 +148,9 @@ def add_funds_to_goal(
             detail="This goal has already been completed."
         )
 
-    # Get the wallet
-    db_wallet = db.query(Wallet).filter(
-        Wallet.id == fund_data.wallet_id,
-        Wallet.owner_id == current_user.id
-    ).first()
-    if not db_wallet:
+    # Get the wallet; only its owner can move money out of it into a goal
+    db_wallet = await access.get(fund_data.wallet_id)
+    if not db_wallet or db_wallet.owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Wallet not found or you do not have access to it"
@@ -157,7 +164,7 @@ def add_funds_to_goal(
         )
 
     # Perform the transaction
-    db_wallet.balance -= fund_data.amount
+    ledger.record(db, db_wallet.id, -fund_data.amount, "goal", db_goal.id, current_user.id)
     db_goal.current_amount += fund_data.amount
     db_goal.updated_at = datetime.utcnow()
 
@@ -165,8 +172,7 @@ def add_funds_to_goal(
     if db_goal.current_amount >= db_goal.target_amount:
         db_goal.is_completed = True
 
-    db.commit()
-    db.refresh(db_goal)
-    db.refresh(db_wallet)
+    await bump_wallets(db, [db_wallet.id])
+    await db.commit()
 
     return db_goal
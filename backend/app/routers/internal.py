@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Response
+
+from ..core.metrics import http_metrics
+from ..core.pool import pool_stats
+from ..core.security import principal_cache
+
+router = APIRouter()
+
+@router.get("/stats")
+def get_internal_stats():
+    """Operational counters for connection pools and in-process caches"""
+    return {
+        "pools": {name: stats.snapshot() for name, stats in pool_stats.items()},
+        "principal_cache": principal_cache.stats(),
+    }
+
+@router.get("/metrics")
+def get_metrics():
+    """Request counts, latency histograms and in-flight gauges in Prometheus text format"""
+    return Response(content=http_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
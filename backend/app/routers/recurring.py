@@ -0,0 +1,158 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+import uuid
+from datetime import datetime, timezone
+
+from ..models.models import RecurringExpense, User, new_row
+from ..schemas.schemas import (
+    RecurringExpense as RecurringExpenseSchema, RecurringExpenseCreate, RecurringExpenseUpdate
+)
+from ..core.database import get_async_db
+from ..core.security import get_current_user
+from ..core.serialization import RowSerializer
+from ..core.versioning import bump_users, cache_headers, list_etag
+from ..core.access import WalletAccess, get_wallet_access
+from ..core.recurring import skip_to
+
+router = APIRouter()
+
+recurring_rows = RowSerializer(RecurringExpenseSchema, RecurringExpense)
+
+@router.post("/", response_model=RecurringExpenseSchema, status_code=status.HTTP_201_CREATED)
+async def create_recurring_expense(
+    rule: RecurringExpenseCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    access: WalletAccess = Depends(get_wallet_access)
+):
+    """Create a recurring expense; the scheduler adds its occurrences from start_date on"""
+    await access.require(rule.wallet_id, detail="Not authorized to add expenses to this wallet")
+
+    db_rule = new_row(
+        RecurringExpense,
+        **rule.dict(),
+        user_id=current_user.id,
+        next_occurrence=rule.start_date,
+        occurrence_count=0,
+        is_active=True,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_rule)
+    await bump_users(db, [current_user.id])
+    await db.commit()
+    return db_rule
+
+@router.get("/", response_model=List[RecurringExpenseSchema])
+async def list_recurring_expenses(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(list_etag)
+):
+    """List the current user's recurring expenses"""
+    return recurring_rows.response(await db.execute(recurring_rows.select()
+        .where(RecurringExpense.user_id == current_user.id)
+        .order_by(RecurringExpense.created_at, RecurringExpense.id)
+        .offset(skip)
+        .limit(limit)
+    ), headers=cache_headers(etag))
+
+@router.get("/{rule_id}", response_model=RecurringExpenseSchema)
+async def get_recurring_expense(
+    rule_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a specific recurring expense by ID"""
+    db_rule = (await db.execute(select(RecurringExpense).where(
+        RecurringExpense.id == rule_id,
+        RecurringExpense.user_id == current_user.id
+    ))).scalars().first()
+
+    if not db_rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring expense not found"
+        )
+    return db_rule
+
+@router.put("/{rule_id}", response_model=RecurringExpenseSchema)
+async def update_recurring_expense(
+    rule_id: uuid.UUID,
+    rule_update: RecurringExpenseUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update a recurring expense; changes apply to occurrences not created yet"""
+    update_data = rule_update.dict(exclude_unset=True)
+    for field in ("amount", "is_active"):
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{field} cannot be null"
+            )
+    update_data["updated_at"] = datetime.utcnow()
+
+    owned = [RecurringExpense.id == rule_id, RecurringExpense.user_id == current_user.id]
+    conditions = list(owned)
+    if update_data.get("is_active"):
+        # A paused rule resumes from today instead of catching up on the pause;
+        # the row lock keeps the scheduler from advancing it in between
+        paused = (await db.execute(
+            select(RecurringExpense).where(*owned, RecurringExpense.is_active.is_(False)).with_for_update()
+        )).scalars().first()
+        if paused:
+            update_data["occurrence_count"], update_data["next_occurrence"] = skip_to(
+                paused, datetime.now(timezone.utc).date()
+            )
+    if update_data.get("end_date") is not None:
+        conditions.append(RecurringExpense.start_date <= update_data["end_date"])
+
+    # One UPDATE ... RETURNING checks ownership and the end date and loads the result
+    db_rule = (await db.execute(
+        update(RecurringExpense)
+        .where(*conditions)
+        .values(**update_data)
+        .returning(RecurringExpense)
+    )).scalars().first()
+
+    if not db_rule:
+        if (await db.execute(select(RecurringExpense.id).where(*owned))).scalar():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date must not be before start_date"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring expense not found"
+        )
+
+    await bump_users(db, [current_user.id])
+    await db.commit()
+    return db_rule
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_recurring_expense(
+    rule_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a recurring expense; expenses it already created are kept"""
+    deleted_id = (await db.execute(
+        delete(RecurringExpense)
+        .where(RecurringExpense.id == rule_id, RecurringExpense.user_id == current_user.id)
+        .returning(RecurringExpense.id)
+    )).scalar()
+
+    if not deleted_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring expense not found"
+        )
+
+    await bump_users(db, [current_user.id])
+    await db.commit()
+    return None
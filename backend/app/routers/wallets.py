@@ -1,93 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Optional
 import uuid
 
-from ..models.models import Wallet, User, wallet_shares
+from ..models.models import Wallet, User, WalletLedgerEntry, WalletBalanceSnapshot, RecurringExpense, wallet_shares, new_row
 from ..schemas.schemas import Wallet as WalletSchema, WalletCreate, WalletAddBalance
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..core.security import get_current_user
+from ..core.access import WalletAccess, get_wallet_access, accessible_wallet_ids
+from ..core.versioning import bump_wallets, cache_headers, list_etag
+from ..core import ledger
 
 router = APIRouter(
     tags=["wallets"],
     responses={404: {"description": "Not found"}},
 )
 
-def check_wallet_access(db: Session, wallet_id: uuid.UUID, user_id: uuid.UUID):
-    """Check if user has access to the wallet"""
-    wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-    
-    # Check if user is owner or has shared access
-    if wallet.owner_id != user_id and user_id not in [u.id for u in wallet.shared_with]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this wallet"
-        )
+async def _with_members(db: AsyncSession, wallet: Wallet) -> Wallet:
+    """Load the members that the Wallet response serializes; async sessions cannot lazy load"""
+    members = (await db.execute(
+        select(User).join(wallet_shares, wallet_shares.c.user_id == User.id)
+        .where(wallet_shares.c.wallet_id == wallet.id)
+    )).scalars().all()
+    set_committed_value(wallet, "shared_with", members)
     return wallet
 
+def visible_wallets(user_id: uuid.UUID):
+    """Select the wallets the user owns or that are shared with them, members loaded, oldest first"""
+    # Each branch of the id subquery is served by its own index, unlike an OR across an outer join.
+    return select(Wallet).where(
+        Wallet.id.in_(accessible_wallet_ids(user_id))
+    ).options(selectinload(Wallet.shared_with)).order_by(Wallet.created_at, Wallet.id)
+
 @router.get("/", response_model=List[WalletSchema])
 async def list_wallets(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    etag: str = Depends(list_etag)
 ):
     """List all wallets for the current user (owned and shared)"""
-    # Query for wallets that are either owned by the user or shared with the user.
-    query = db.query(Wallet).outerjoin(
-        wallet_shares, Wallet.id == wallet_shares.c.wallet_id
-    ).filter(
-        (Wallet.owner_id == current_user.id) | (wallet_shares.c.user_id == current_user.id)
-    ).distinct()
-
-    wallets = query.offset(skip).limit(limit).all()
+    wallets = (await db.execute(visible_wallets(current_user.id).offset(skip).limit(limit))).scalars().all()
+    response.headers.update(cache_headers(etag))
     return wallets
 
 @router.post("/", response_model=WalletSchema, status_code=status.HTTP_201_CREATED)
 async def create_wallet(
     wallet: WalletCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new wallet"""
-    db_wallet = Wallet(
-        **wallet.dict(exclude={"shared_with"}),
+    db_wallet = new_row(
+        Wallet,
+        **wallet.dict(exclude={"shared_with", "balance"}),
         owner_id=current_user.id
     )
     
     # Add shared users if any
+    shared_users = []
     if wallet.shared_with:
-        shared_users = db.query(User).filter(
-            User.id.in_(wallet.shared_with)
-        ).all()
-        db_wallet.shared_with = shared_users
+        shared_users = (await db.execute(
+            select(User).where(User.id.in_(wallet.shared_with))
+        )).scalars().all()
+    db_wallet.shared_with = shared_users
     
     db.add(db_wallet)
-    db.commit()
-    db.refresh(db_wallet)
+    if wallet.balance:
+        # The wallet row must exist before its first ledger entry
+        await db.flush()
+        ledger.record(db, db_wallet.id, wallet.balance, "opening", user_id=current_user.id)
+    # The new wallet's id joins its members' list ETag keys, so there is nothing to bump
+    await db.commit()
+
+    # The balance of a new wallet is its opening entry; no need to read it back
+    set_committed_value(db_wallet, "balance", wallet.balance)
     return db_wallet
 
 @router.get("/{wallet_id}", response_model=WalletSchema)
 async def get_wallet(
     wallet_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Get a specific wallet by ID"""
-    wallet = check_wallet_access(db, wallet_id, current_user.id)
-    return wallet
+    wallet = await access.require(wallet_id)
+    return await _with_members(db, wallet)
 
 @router.post("/{wallet_id}/add_balance", response_model=WalletSchema)
 async def add_balance_to_wallet(
     wallet_id: uuid.UUID,
     balance_data: WalletAddBalance,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Add balance to a specific wallet."""
-    db_wallet = check_wallet_access(db, wallet_id, current_user.id)
+    db_wallet = await access.require(wallet_id)
 
     if balance_data.amount <= 0:
         raise HTTPException(
@@ -95,19 +109,23 @@ async def add_balance_to_wallet(
             detail="Amount must be positive"
         )
 
-    db_wallet.balance += balance_data.amount
-    db.commit()
-    db.refresh(db_wallet)
-    return db_wallet
+    ledger.record(db, db_wallet.id, balance_data.amount, "deposit", user_id=current_user.id)
+    await bump_wallets(db, [db_wallet.id])
+    await db.commit()
+
+    # Report the balance this request read plus its own deposit rather than re-reading the ledger
+    set_committed_value(db_wallet, "balance", db_wallet.balance + balance_data.amount)
+    return await _with_members(db, db_wallet)
 
 @router.delete("/{wallet_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_wallet(
     wallet_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    access: WalletAccess = Depends(get_wallet_access)
 ):
     """Delete a wallet"""
-    db_wallet = check_wallet_access(db, wallet_id, current_user.id)
+    db_wallet = await access.require(wallet_id)
     
     # Only owner can delete the wallet
     if db_wallet.owner_id != current_user.id:
@@ -116,6 +134,11 @@ async def delete_wallet(
             detail="Only the owner can delete this wallet"
         )
     
-    db.delete(db_wallet)
-    db.commit()
+    # Members lose the wallet's id from their list ETag keys, so there is nothing to bump
+    # The wallet's balance history goes with it
+    await db.execute(delete(WalletLedgerEntry).where(WalletLedgerEntry.wallet_id == db_wallet.id))
+    await db.execute(delete(WalletBalanceSnapshot).where(WalletBalanceSnapshot.wallet_id == db_wallet.id))
+    await db.execute(delete(RecurringExpense).where(RecurringExpense.wallet_id == db_wallet.id))
+    await db.delete(db_wallet)
+    await db.commit()
     return {"ok": True}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 from datetime import datetime, date
 from uuid import UUID
 
@@ -88,6 +88,11 @@ class Wallet(WalletBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+    @validator('shared_with', pre=True)
+    def member_ids(cls, v):
+        # The ORM relationship holds User rows; the API exposes their ids
+        return [getattr(member, 'id', member) for member in v]
+
     class Config:
         from_attributes = True
 
@@ -100,6 +105,43 @@ class Expense(ExpenseBase):
     class Config:
         from_attributes = True
 
+class ExpensePage(BaseModel):
+    items: List[Expense]
+    next_cursor: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ExpenseImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+class ExpenseBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    # The expense to update or delete
+    id: Optional[UUID] = None
+    # Fields of the new expense, or the fields to change
+    expense: Optional[ExpenseUpdate] = None
+
+class ExpenseBatch(BaseModel):
+    operations: List[ExpenseBatchOperation]
+
+class ExpenseBatchOperationResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: Optional[UUID] = None
+    # The expense as it stands after the whole batch; absent for deletes and failures
+    expense: Optional[Expense] = None
+    error: Optional[str] = None
+
+class ExpenseBatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[ExpenseBatchOperationResult]
+
 class Goal(GoalBase):
     id: UUID
     user_id: UUID
@@ -145,10 +187,91 @@ class Budget(BudgetBase):
     class Config:
         from_attributes = True
 
+class BudgetUtilization(Budget):
+    # Budget amounts and spend are in the base currency
+    currency: str
+    spent: float
+    remaining: float
+    percent_used: float
+    # Wallet currencies without exchange rates; their spend is left out of spent
+    unconverted_currencies: List[str] = Field(default_factory=list)
+
+# Recurring expense schemas
+class RecurringExpenseBase(BaseModel):
+    amount: float = Field(..., gt=0, description="Amount must be greater than 0")
+    description: Optional[str] = None
+    category: Optional[str] = None
+    frequency: Literal["daily", "weekly", "monthly", "yearly"]
+    interval: int = Field(1, ge=1, description="Number of periods between occurrences")
+    start_date: date
+    end_date: Optional[date] = None
+
+    @validator('end_date')
+    def end_after_start(cls, v, values):
+        if v is not None and 'start_date' in values and v < values['start_date']:
+            raise ValueError("end_date must not be before start_date")
+        return v
+
+class RecurringExpenseCreate(RecurringExpenseBase):
+    wallet_id: UUID
+
+class RecurringExpenseUpdate(BaseModel):
+    amount: Optional[float] = Field(None, gt=0, description="Amount must be greater than 0")
+    description: Optional[str] = None
+    category: Optional[str] = None
+    end_date: Optional[date] = None
+    is_active: Optional[bool] = None
+
+class RecurringExpense(RecurringExpenseBase):
+    id: UUID
+    wallet_id: UUID
+    user_id: UUID
+    next_occurrence: date
+    occurrence_count: int
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Analytics schemas
+class CategoryTotal(BaseModel):
+    category: Optional[str] = None
+    total: float
+    count: int
+
+class SpendingPoint(BaseModel):
+    period: date
+    total: float
+
+class SpendingSummary(BaseModel):
+    currency: str
+    total: float
+    current_month_total: float
+    last_month_total: float
+    by_category: List[CategoryTotal]
+    daily: List[SpendingPoint]
+    monthly: List[SpendingPoint]
+    # Wallet currencies without exchange rates; their spend is left out of every total
+    unconverted_currencies: List[str] = Field(default_factory=list)
+
+class Dashboard(BaseModel):
+    user: User
+    wallets: List[Wallet]
+    recent_expenses: List[Expense]
+    goals: List[Goal]
+    budgets: List[BudgetUtilization]
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
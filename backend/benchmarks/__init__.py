@@ -0,0 +1,5 @@
+"""Benchmarks for the Expense Tracker API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.login_storm``.
+They need the packages in benchmarks/requirements.txt on top of the app's own.
+"""
@@ -0,0 +1,247 @@
+"""Populate the database at DATABASE_URL with deterministic synthetic data.
+
+The same seed, sizes and --anchor date always produce the same rows, ids
+included, so two benchmark runs against freshly generated databases see
+identical data. Activity is skewed the way real usage is: a few wallets carry
+most expenses, a handful of categories dominate, amounts are log-normal and
+recent months are busier.
+Wallet ledgers and spending rollups are written to match the expenses.
+
+Works against PostgreSQL or an embedded SQLite file:
+
+    cd backend
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.datagen --expenses 200000
+    python -m benchmarks.datagen --users 5000 --expenses 2000000
+
+Every generated user can log in as bench-user-<n>@example.com with password
+"benchmark"; user 0 is the busiest.
+"""
+import argparse
+import bisect
+import itertools
+import math
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from app.core.database import engine, init_db
+from app.core.rollups import month_of
+from app.core.security import get_password_hash
+from app.models.models import (
+    Budget, Expense, Goal, SpendingRollup, User, Wallet, WalletLedgerEntry, wallet_shares
+)
+
+PASSWORD = "benchmark"
+EMAIL_TEMPLATE = "bench-user-{}@example.com"
+BATCH_SIZE = 10000
+
+# (category, relative frequency, median amount); None is an uncategorized expense
+CATEGORIES = [
+    ("food", 30, 12.0),
+    ("groceries", 15, 45.0),
+    ("transport", 12, 8.0),
+    ("bills", 10, 80.0),
+    ("shopping", 10, 35.0),
+    ("entertainment", 8, 20.0),
+    ("rent", 5, 900.0),
+    ("health", 5, 40.0),
+    ("travel", 3, 250.0),
+    (None, 2, 15.0),
+]
+DESCRIPTIONS = ["Lunch", "Coffee", "Taxi", "Electricity", "Movie night", "Pharmacy", "Weekly shop", "Gift", None]
+WALLET_TYPES = ["personal", "personal", "personal", "shared", "business"]
+
+
+def email_for(index: int) -> str:
+    return EMAIL_TEMPLATE.format(index)
+
+
+class Generator:
+    """Deterministic stream of synthetic rows for one seed"""
+
+    def __init__(self, seed: int, users: int, expenses: int, days: int, share_ratio: float, anchor: date):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.expenses = expenses
+        self.days = days
+        self.share_ratio = share_ratio
+        # Every date is relative to the anchor, so the same anchor reproduces the same rows
+        self.now = datetime(anchor.year, anchor.month, anchor.day, tzinfo=timezone.utc)
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def user_rows(self, hashed_password: str):
+        return [
+            {"id": self.uuid(), "email": email_for(i), "hashed_password": hashed_password, "full_name": f"Bench User {i}"}
+            for i in range(self.users)
+        ]
+
+    def wallet_rows(self, users):
+        wallets = []
+        for user in users:
+            for n in range(1 + int(self.rng.random() < 0.5) + int(self.rng.random() < 0.2)):
+                wallets.append({
+                    "id": self.uuid(),
+                    "name": f"Wallet {n + 1}",
+                    "type": self.rng.choice(WALLET_TYPES),
+                    "currency": "INR",
+                    "owner_id": user["id"],
+                })
+        return wallets
+
+    def share_rows(self, wallets, users):
+        """Share a fraction of wallets with one to four other users"""
+        shares = []
+        members = defaultdict(list)
+        for wallet in wallets:
+            if self.rng.random() >= self.share_ratio:
+                continue
+            for user in self.rng.sample(users, min(len(users), self.rng.randint(1, 4))):
+                if user["id"] != wallet["owner_id"] and user["id"] not in members[wallet["id"]]:
+                    members[wallet["id"]].append(user["id"])
+                    shares.append({"wallet_id": wallet["id"], "user_id": user["id"]})
+        return shares, members
+
+    def budget_rows(self, users):
+        budgets = []
+        month_start = self.now.replace(day=1)
+        for user in users:
+            for category, _, median in self.rng.sample(CATEGORIES[:-1], self.rng.randint(0, 4)):
+                budgets.append({
+                    "id": self.uuid(),
+                    "category": category,
+                    "amount": round(median * self.rng.uniform(10, 40), 2),
+                    "start_date": month_start,
+                    "end_date": month_start + timedelta(days=31),
+                    "user_id": user["id"],
+                })
+        return budgets
+
+    def goal_rows(self, users):
+        goals = []
+        for user in users:
+            for n in range(self.rng.randint(0, 3)):
+                target = round(self.rng.uniform(500, 20000), 2)
+                goals.append({
+                    "id": self.uuid(),
+                    "name": f"Goal {n + 1}",
+                    "target_amount": target,
+                    "current_amount": round(target * self.rng.random() * 0.8, 2),
+                    "deadline": self.now + timedelta(days=self.rng.randint(30, 720)),
+                    "is_completed": False,
+                    "user_id": user["id"],
+                })
+        return goals
+
+    def expense_rows(self, wallets, members):
+        """Yield expenses; wallet popularity follows a Zipf distribution"""
+        popularity = list(itertools.accumulate(1.0 / (rank + 1) ** 1.1 for rank in range(len(wallets))))
+        category_weights = list(itertools.accumulate(weight for _, weight, _ in CATEGORIES))
+        for _ in range(self.expenses):
+            wallet = wallets[bisect.bisect(popularity, self.rng.random() * popularity[-1])]
+            category, _, median = CATEGORIES[bisect.bisect(category_weights, self.rng.random() * category_weights[-1])]
+            spender = wallet["owner_id"]
+            if members[wallet["id"]] and self.rng.random() < 0.3:
+                spender = self.rng.choice(members[wallet["id"]])
+            # Recent activity is denser: days ago is exponential, wrapped into the window
+            days_ago = int(self.rng.expovariate(1 / (self.days / 3))) % self.days
+            yield {
+                "id": self.uuid(),
+                "amount": round(median * math.exp(self.rng.gauss(0, 0.6)), 2),
+                "description": self.rng.choice(DESCRIPTIONS),
+                "category": category,
+                "date": self.now - timedelta(days=days_ago, seconds=self.rng.randrange(86400)),
+                "wallet_id": wallet["id"],
+                "user_id": spender,
+            }
+
+
+def _insert(conn, model, rows) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def generate(seed: int, users: int, expenses: int, days: int, share_ratio: float, anchor: date) -> dict:
+    init_db()
+    gen = Generator(seed, users, expenses, days, share_ratio, anchor)
+    hashed_password = get_password_hash(PASSWORD)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        if conn.execute(select(User.id).where(User.email == email_for(0))).first():
+            raise SystemExit("Benchmark data already present; generate into an empty database")
+
+        user_rows = gen.user_rows(hashed_password)
+        wallet_rows = gen.wallet_rows(user_rows)
+        share_rows, members = gen.share_rows(wallet_rows, user_rows)
+        _insert(conn, User, user_rows)
+        _insert(conn, Wallet, wallet_rows)
+        _insert(conn, wallet_shares, share_rows)
+        _insert(conn, Budget, gen.budget_rows(user_rows))
+        _insert(conn, Goal, gen.goal_rows(user_rows))
+
+        spent = defaultdict(float)
+        rollups = defaultdict(lambda: [0, 0.0])
+        batch = []
+        for row in gen.expense_rows(wallet_rows, members):
+            batch.append(row)
+            spent[row["wallet_id"]] += row["amount"]
+            bucket = rollups[(row["wallet_id"], row["user_id"], row["category"] or "", month_of(row["date"]))]
+            bucket[0] += 1
+            bucket[1] += row["amount"]
+            if len(batch) >= BATCH_SIZE:
+                conn.execute(insert(Expense), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Expense), batch)
+
+        # Opening balances cover a few months of spending; expenses are one netted entry per wallet
+        ledger_rows = []
+        for wallet in wallet_rows:
+            opening = round(spent[wallet["id"]] * gen.rng.uniform(1.0, 1.5) + 1000, 2)
+            ledger_rows.append({"wallet_id": wallet["id"], "amount": opening, "kind": "opening"})
+            if spent[wallet["id"]]:
+                ledger_rows.append({"wallet_id": wallet["id"], "amount": -spent[wallet["id"]], "kind": "import"})
+        _insert(conn, WalletLedgerEntry, ledger_rows)
+        _insert(conn, SpendingRollup, [
+            {"wallet_id": w, "user_id": u, "category": c, "month": m, "count": n, "total": t}
+            for (w, u, c, m), (n, t) in rollups.items()
+        ])
+
+    return {
+        "seed": seed,
+        "anchor": anchor.isoformat(),
+        "users": len(user_rows),
+        "wallets": len(wallet_rows),
+        "shares": len(share_rows),
+        "expenses": expenses,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--expenses", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730, help="history window for expense dates")
+    parser.add_argument("--share-ratio", type=float, default=0.2, help="fraction of wallets shared with others")
+    parser.add_argument(
+        "--anchor", type=date.fromisoformat, default=datetime.now(timezone.utc).date(),
+        help="date the history ends on (YYYY-MM-DD); defaults to today"
+    )
+    args = parser.parse_args()
+
+    summary = generate(args.seed, args.users, args.expenses, args.days, args.share_ratio, args.anchor)
+    print(", ".join(f"{key}={value}" for key, value in summary.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""Drive a weighted mix of requests across every router and record a JSON baseline.
+
+Each virtual user logs in as one of the users created by benchmarks.datagen and
+then issues requests picked from OPERATIONS by weight, using a seeded random
+generator, until the duration is up. Latency percentiles and throughput are
+reported per route template and overall. Results can be saved and later runs
+compared against them:
+
+    cd backend
+    python -m benchmarks.load --duration 60 --output baseline.json
+    python -m benchmarks.load --duration 60 --compare baseline.json
+
+By default the app runs in-process against DATABASE_URL, so no network is
+involved; --base-url points the driver at a running server instead.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.datagen import CATEGORIES, DESCRIPTIONS, PASSWORD, email_for
+from benchmarks.stats import summarize
+
+# Words the generated descriptions and categories contain, for the search route
+SEARCH_TERMS = sorted({
+    word.lower() for text in DESCRIPTIONS + [category for category, _, _ in CATEGORIES] if text
+    for word in text.split()
+})
+# Operations per batch request: creates, plus an update and a delete of earlier creates
+BATCH_CREATES = 8
+
+# Compared percentiles and the change, in percent, that is reported as a regression
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+REGRESSION_THRESHOLD = 10.0
+
+
+class VirtualUser:
+    """One logged-in client and the ids it has discovered or created"""
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.refresh_token: Optional[str] = None
+        self.wallet_ids: List[str] = []
+        self.expense_ids: List[str] = []
+        self.created_expense_ids: List[str] = []
+        self.goal_ids: List[str] = []
+        self.next_cursor: Optional[str] = None
+
+    async def login(self, email: str) -> None:
+        response = await self.client.post("/api/auth/token", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        self._use_tokens(response.json())
+        wallets = (await self.client.get("/api/wallets/", headers=self.headers)).json()
+        self.wallet_ids = [wallet["id"] for wallet in wallets]
+        expenses = (await self.client.get("/api/expenses/", params={"limit": 100}, headers=self.headers)).json()
+        self.expense_ids = [expense["id"] for expense in expenses]
+        goals = (await self.client.get("/api/goals/", headers=self.headers)).json()
+        self.goal_ids = [goal["id"] for goal in goals]
+
+    def _use_tokens(self, tokens: dict) -> None:
+        self.headers = {"Authorization": "Bearer " + tokens["access_token"]}
+        self.refresh_token = tokens.get("refresh_token")
+
+    def get(self, url: str, **kwargs):
+        return self.client.get(url, headers=self.headers, **kwargs)
+
+    async def list_wallets(self):
+        return await self.get("/api/wallets/")
+
+    async def get_wallet(self):
+        if self.wallet_ids:
+            return await self.get(f"/api/wallets/{self.rng.choice(self.wallet_ids)}")
+
+    async def add_balance(self):
+        if self.wallet_ids:
+            return await self.client.post(
+                f"/api/wallets/{self.rng.choice(self.wallet_ids)}/add_balance",
+                json={"amount": round(self.rng.uniform(10, 500), 2)}, headers=self.headers
+            )
+
+    async def list_expenses(self):
+        return await self.get("/api/expenses/", params={"limit": 50})
+
+    async def page_expenses(self):
+        params = {"limit": 50}
+        if self.next_cursor:
+            params["cursor"] = self.next_cursor
+        response = await self.get("/api/expenses/page", params=params)
+        if response.status_code == 200:
+            self.next_cursor = response.json()["next_cursor"]
+        return response
+
+    async def get_expense(self):
+        if self.expense_ids:
+            return await self.get(f"/api/expenses/{self.rng.choice(self.expense_ids)}")
+
+    async def create_expense(self):
+        if not self.wallet_ids:
+            return None
+        response = await self.client.post("/api/expenses/", json={
+            "amount": round(self.rng.uniform(1, 120), 2),
+            "category": self.rng.choice(["food", "transport", "shopping", "bills"]),
+            "description": "Load test",
+            "wallet_id": self.rng.choice(self.wallet_ids),
+        }, headers=self.headers)
+        if response.status_code == 201:
+            self.created_expense_ids.append(response.json()["id"])
+        return response
+
+    async def update_expense(self):
+        if self.created_expense_ids:
+            return await self.client.put(
+                f"/api/expenses/{self.rng.choice(self.created_expense_ids)}",
+                json={"amount": round(self.rng.uniform(1, 120), 2)}, headers=self.headers
+            )
+
+    async def delete_expense(self):
+        # Deletes only what this run created, so repeated runs start from the same data
+        if self.created_expense_ids:
+            expense_id = self.created_expense_ids.pop(self.rng.randrange(len(self.created_expense_ids)))
+            return await self.client.delete(f"/api/expenses/{expense_id}", headers=self.headers)
+
+    async def search_expenses(self):
+        return await self.get("/api/expenses/search", params={"q": self.rng.choice(SEARCH_TERMS), "limit": 20})
+
+    async def batch_expenses(self):
+        if not self.wallet_ids:
+            return None
+        operations = [{"op": "create", "expense": {
+            "amount": round(self.rng.uniform(1, 120), 2),
+            "category": self.rng.choice(["food", "transport", "shopping", "bills"]),
+            "description": "Load test batch",
+            "wallet_id": self.rng.choice(self.wallet_ids),
+        }} for _ in range(BATCH_CREATES)]
+        if self.created_expense_ids:
+            operations.append({
+                "op": "update", "id": self.rng.choice(self.created_expense_ids),
+                "expense": {"amount": round(self.rng.uniform(1, 120), 2)}
+            })
+        if len(self.created_expense_ids) > 1:
+            expense_id = self.created_expense_ids.pop(self.rng.randrange(len(self.created_expense_ids)))
+            operations.append({"op": "delete", "id": expense_id})
+        response = await self.client.post(
+            "/api/expenses/batch", json={"operations": operations}, headers=self.headers
+        )
+        if response.status_code == 200:
+            self.created_expense_ids.extend(
+                result["id"] for result in response.json()["results"] if result["op"] == "create" and result["ok"]
+            )
+        return response
+
+    async def list_goals(self):
+        return await self.get("/api/goals/")
+
+    async def get_goal(self):
+        if self.goal_ids:
+            return await self.get(f"/api/goals/{self.rng.choice(self.goal_ids)}")
+
+    async def list_budgets(self):
+        return await self.get("/api/budgets/")
+
+    async def budget_utilization(self):
+        return await self.get("/api/budgets/utilization")
+
+    async def spending_summary(self):
+        return await self.get("/api/analytics/")
+
+    async def dashboard(self):
+        return await self.get("/api/dashboard/")
+
+    async def list_recurring_expenses(self):
+        return await self.get("/api/recurring-expenses/")
+
+    async def me(self):
+        return await self.get("/api/auth/me")
+
+    async def refresh(self):
+        response = await self.client.post("/api/auth/refresh", json={"refresh_token": self.refresh_token})
+        if response.status_code == 200:
+            self._use_tokens(response.json())
+        return response
+
+
+# (route template, weight, VirtualUser method); reads dominate as they do in the app
+OPERATIONS = [
+    ("GET /api/wallets/", 10, VirtualUser.list_wallets),
+    ("GET /api/wallets/{wallet_id}", 5, VirtualUser.get_wallet),
+    ("POST /api/wallets/{wallet_id}/add_balance", 2, VirtualUser.add_balance),
+    ("GET /api/expenses/", 15, VirtualUser.list_expenses),
+    ("GET /api/expenses/page", 10, VirtualUser.page_expenses),
+    ("GET /api/expenses/{expense_id}", 8, VirtualUser.get_expense),
+    ("POST /api/expenses/", 6, VirtualUser.create_expense),
+    ("PUT /api/expenses/{expense_id}", 3, VirtualUser.update_expense),
+    ("DELETE /api/expenses/{expense_id}", 3, VirtualUser.delete_expense),
+    ("GET /api/expenses/search", 4, VirtualUser.search_expenses),
+    ("POST /api/expenses/batch", 1, VirtualUser.batch_expenses),
+    ("GET /api/goals/", 4, VirtualUser.list_goals),
+    ("GET /api/goals/{goal_id}", 2, VirtualUser.get_goal),
+    ("GET /api/budgets/", 3, VirtualUser.list_budgets),
+    ("GET /api/budgets/utilization", 4, VirtualUser.budget_utilization),
+    ("GET /api/analytics/", 5, VirtualUser.spending_summary),
+    ("GET /api/dashboard/", 6, VirtualUser.dashboard),
+    ("GET /api/recurring-expenses/", 1, VirtualUser.list_recurring_expenses),
+    ("GET /api/auth/me", 3, VirtualUser.me),
+    ("POST /api/auth/refresh", 1, VirtualUser.refresh),
+]
+
+
+async def drive(user: VirtualUser, deadline: float, latencies: Dict[str, list], errors: Dict[str, int]) -> None:
+    names = [name for name, _, _ in OPERATIONS]
+    weights = [weight for _, weight, _ in OPERATIONS]
+    methods = {name: method for name, _, method in OPERATIONS}
+    while time.perf_counter() < deadline:
+        name = user.rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await methods[name](user)
+        except Exception:
+            # The in-process transport re-raises what a server would answer 500 to;
+            # count it against the route and keep driving the others
+            errors[name] += 1
+            continue
+        if response is None:
+            continue
+        latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[name] += 1
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(duration: float, concurrency: int, seed: int, base_url: Optional[str]) -> dict:
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+        database = None
+    else:
+        from app.core.database import async_engine
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+        database = async_engine.dialect.name
+
+    latencies: Dict[str, list] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    async with client:
+        users = [VirtualUser(client, random.Random(seed + i)) for i in range(concurrency)]
+        # Logging in hashes a password per user; it happens before the clock starts
+        await asyncio.gather(*(user.login(email_for(i)) for i, user in enumerate(users)))
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(drive(user, deadline, latencies, errors) for user in users))
+        elapsed = time.perf_counter() - started
+
+        # Leave the data as it was found
+        for user in users:
+            while user.created_expense_ids:
+                await user.delete_expense()
+
+    return {
+        "meta": {
+            "started_at": (datetime.now(timezone.utc) - timedelta(seconds=elapsed)).isoformat(),
+            "duration_s": duration,
+            "concurrency": concurrency,
+            "seed": seed,
+            "target": base_url or "in-process",
+            "database": database,
+            "python": platform.python_version(),
+            "commit": _git_commit(),
+        },
+        "overall": {
+            **summarize([value for series in latencies.values() for value in series], elapsed),
+            "errors": sum(errors.values()),
+        },
+        "operations": {
+            name: {**summarize(latencies[name], elapsed), "errors": errors[name]}
+            for name, _, _ in OPERATIONS if latencies[name] or errors[name]
+        },
+    }
+
+
+def compare(result: dict, baseline: dict) -> int:
+    """Print percentile changes against a baseline; return how many regressed beyond the threshold"""
+    regressions = 0
+    rows = [("overall", result["overall"], baseline["overall"])]
+    rows += [
+        (name, stats, baseline["operations"][name])
+        for name, stats in result["operations"].items() if name in baseline["operations"]
+    ]
+    for name, current, previous in rows:
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ""
+            if change > REGRESSION_THRESHOLD:
+                regressions += 1
+                flag = " !"
+            changes.append(f"{metric[:-3]} {before:.1f}->{after:.1f}ms ({change:+.0f}%){flag}")
+        print(f"{name:45} " + "  ".join(changes))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to drive load after login")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users, logged in as bench users 0..n-1")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare the results against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.duration, args.concurrency, args.seed, args.base_url))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(result, json.load(f)) else 0
+    if not args.output:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
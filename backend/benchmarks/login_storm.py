@@ -0,0 +1,90 @@
+"""Measure login latency and the latency of unrelated requests during a login storm.
+
+A pool of clients logs in back to back while probe clients keep requesting the
+non-authenticated root endpoint. If password hashing ran on the event loop, every
+bcrypt call would stall the probes; with hashing on the worker pool they stay
+flat. The app runs in-process against the database at DATABASE_URL. Compare
+runs with the pool disabled:
+
+    cd backend
+    python -m benchmarks.login_storm
+    PASSWORD_HASH_WORKERS=0 python -m benchmarks.login_storm
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.core import security
+from app.core.database import init_db
+from app.main import app
+from benchmarks.stats import summarize
+
+EMAIL = "login-storm@example.com"
+PASSWORD = "login-storm-password"
+
+
+async def login_worker(client: httpx.AsyncClient, deadline: float, latencies: list) -> None:
+    form = {"username": EMAIL, "password": PASSWORD}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post("/api/auth/token", data=form)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def probe_worker(client: httpx.AsyncClient, deadline: float, interval: float, latencies: list) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/")
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+
+
+async def run(duration: float, login_concurrency: int, probe_concurrency: int, probe_interval: float) -> dict:
+    init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        response = await client.post("/api/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        if response.status_code not in (200, 400):
+            response.raise_for_status()
+
+        login_latencies, probe_latencies = [], []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(login_worker(client, deadline, login_latencies) for _ in range(login_concurrency)),
+            *(probe_worker(client, deadline, probe_interval, probe_latencies) for _ in range(probe_concurrency)),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "config": {
+            "duration_s": duration,
+            "login_concurrency": login_concurrency,
+            "probe_concurrency": probe_concurrency,
+            "bcrypt_rounds": security.BCRYPT_ROUNDS,
+            "password_hash_workers": security.PASSWORD_HASH_WORKERS,
+        },
+        "login": summarize(login_latencies, elapsed),
+        "non_auth": summarize(probe_latencies, elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run the storm")
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--probe-concurrency", type=int, default=4)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="seconds between probe requests")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.duration, args.login_concurrency, args.probe_concurrency, args.probe_interval))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
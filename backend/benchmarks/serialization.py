@@ -0,0 +1,86 @@
+"""Compare the ORM and the row-serializer paths for a large page of expenses.
+
+The ORM path is what list_expenses did before: load Expense objects, let FastAPI
+validate them against the response model and encode the result with the
+standard json module. The row path selects plain tuples and encodes them with
+the endpoint's RowSerializer. Both fetch the same newest rows from the database
+at DATABASE_URL (fill it with benchmarks.datagen first), and the two response
+bodies are checked to be byte-identical before timing:
+
+    cd backend
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.models import Expense
+from app.routers.expenses import expense_rows
+from app.schemas.schemas import Expense as ExpenseSchema
+from benchmarks.stats import summarize
+
+RESPONSE_FIELD = create_response_field(name="Response_List_Expenses", type_=List[ExpenseSchema])
+
+
+def _newest(query, rows: int):
+    return query.order_by(Expense.date.desc(), Expense.id.desc()).limit(rows)
+
+
+async def orm_body(db, rows: int) -> bytes:
+    expenses = (await db.execute(_newest(select(Expense), rows))).scalars().all()
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=expenses)
+    return JSONResponse(content).body
+
+
+async def row_body(db, rows: int) -> bytes:
+    return expense_rows.response(await db.execute(_newest(expense_rows.select(), rows))).body
+
+
+async def measure(path, rows: int, repeat: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        # A fresh session each time, so the ORM path cannot reuse objects from its identity map
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await path(db, rows)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run(rows: int, repeat: int) -> dict:
+    async with AsyncSessionLocal() as db:
+        orm, fast = await orm_body(db, rows), await row_body(db, rows)
+    if orm != fast:
+        raise SystemExit("The two paths produced different response bodies")
+    if len(json.loads(fast)) < rows:
+        print(f"warning: only {len(json.loads(fast))} expenses in the database", file=sys.stderr)
+
+    results = {"rows": rows, "body_bytes": len(fast)}
+    results["orm"] = await measure(orm_body, rows, repeat)
+    results["rows_path"] = await measure(row_body, rows, repeat)
+    results["p50_speedup"] = results["orm"]["p50_ms"] / results["rows_path"]["p50_ms"]
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="expenses on the page")
+    parser.add_argument("--repeat", type=int, default=20, help="timed fetches per path")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.rows, args.repeat)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import math
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles, in milliseconds, for one series of requests"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
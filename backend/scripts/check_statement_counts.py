@@ -0,0 +1,126 @@
+"""Check how many SQL statements each write endpoint issues.
+
+Drives the app in-process against the database at DATABASE_URL, counts the
+statements sent through the async engine for every request in the scenario
+below, and exits non-zero if any endpoint exceeds its budget. Run it after
+touching a write path so an extra refresh or lookup is caught:
+
+    cd backend
+    python -m scripts.check_statement_counts
+"""
+import asyncio
+import sys
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.core.database import async_engine, init_db
+from app.main import app
+
+# Maximum statements per request, after authentication has been cached. Every write
+# includes one upsert of a user or wallet data version, which invalidates the list ETags.
+BUDGETS = {
+    "create wallet": 3,
+    "add balance": 4,
+    "create expense": 5,
+    "update expense": 6,
+    "move expense": 9,
+    "delete expense": 7,
+    "batch of 30 expense operations": 10,
+    "create goal": 2,
+    "update goal": 2,
+    "add funds to goal": 5,
+    "delete goal": 2,
+    "create budget": 2,
+    "update budget": 2,
+    "delete budget": 2,
+}
+
+
+class StatementCounter:
+    """Counts statements executed on an engine; reset count between measurements"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def run() -> dict:
+    init_db()
+    counter = StatementCounter(async_engine.sync_engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://statements") as client:
+        email = f"statements-{uuid.uuid4().hex}@example.com"
+        (await client.post("/api/auth/register", json={"email": email, "password": "statements"})).raise_for_status()
+        token = (await client.post("/api/auth/token", data={"username": email, "password": "statements"})).json()
+        headers = {"Authorization": "Bearer " + token["access_token"]}
+        # Resolve the principal once so every measured request hits the cache
+        (await client.get("/api/auth/me", headers=headers)).raise_for_status()
+
+        counts = {}
+
+        async def measure(label: str, method: str, url: str, **kwargs) -> httpx.Response:
+            counter.count = 0
+            response = await client.request(method, url, headers=headers, **kwargs)
+            counts[label] = counter.count
+            response.raise_for_status()
+            return response
+
+        wallet = (await measure("create wallet", "POST", "/api/wallets/", json={"name": "Main", "balance": 100})).json()
+        other = (await client.post("/api/wallets/", headers=headers, json={"name": "Other"})).json()
+        await measure("add balance", "POST", f"/api/wallets/{wallet['id']}/add_balance", json={"amount": 50})
+
+        expense = (await measure("create expense", "POST", "/api/expenses/", json={
+            "amount": 20, "category": "food", "wallet_id": wallet["id"]
+        })).json()
+        await measure("update expense", "PUT", f"/api/expenses/{expense['id']}", json={"amount": 25})
+        await measure("move expense", "PUT", f"/api/expenses/{expense['id']}", json={"wallet_id": other["id"]})
+        await measure("delete expense", "DELETE", f"/api/expenses/{expense['id']}")
+
+        # The batch budget must not grow with the number of operations
+        existing = [
+            (await client.post("/api/expenses/", headers=headers, json={
+                "amount": 5, "category": "food", "wallet_id": wallet["id"]
+            })).json()["id"]
+            for _ in range(20)
+        ]
+        await measure("batch of 30 expense operations", "POST", "/api/expenses/batch", json={"operations": [
+            *({"op": "create", "expense": {"amount": 3, "wallet_id": other["id"]}} for _ in range(10)),
+            *({"op": "update", "id": expense_id, "expense": {"category": "groceries"}} for expense_id in existing[:10]),
+            *({"op": "delete", "id": expense_id} for expense_id in existing[10:]),
+        ]})
+
+        goal = (await measure("create goal", "POST", "/api/goals/", json={"name": "Trip", "target_amount": 500})).json()
+        await measure("update goal", "PUT", f"/api/goals/{goal['id']}", json={"name": "Longer trip"})
+        await measure("add funds to goal", "POST", f"/api/goals/{goal['id']}/add_funds", json={
+            "amount": 10, "wallet_id": wallet["id"]
+        })
+        await measure("delete goal", "DELETE", f"/api/goals/{goal['id']}")
+
+        budget = (await measure("create budget", "POST", "/api/budgets/", json={
+            "category": "food", "amount": 300,
+            "start_date": "2026-01-01T00:00:00Z", "end_date": "2026-01-31T23:59:59Z"
+        })).json()
+        await measure("update budget", "PUT", f"/api/budgets/{budget['id']}", json={"amount": 350})
+        await measure("delete budget", "DELETE", f"/api/budgets/{budget['id']}")
+
+    return counts
+
+
+def main() -> int:
+    counts = asyncio.run(run())
+    failed = False
+    for label, budget in BUDGETS.items():
+        count = counts[label]
+        status = "FAIL" if count > budget else "ok"
+        failed = failed or count > budget
+        print(f"[{status}] {label}: {count} statements (budget {budget})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
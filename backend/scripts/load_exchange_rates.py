@@ -0,0 +1,35 @@
+"""Load exchange rates from a local CSV file into the exchange_rates table.
+
+The file has a date,currency,rate header; rate is how many units of
+BASE_CURRENCY one unit of currency was worth on that date. Rows already in the
+table for the same currency and date are overwritten, so the file can be
+reloaded after every update. Running API processes pick the new rates up once
+their cache expires (EXCHANGE_RATE_CACHE_SECONDS):
+
+    cd backend
+    python -m scripts.load_exchange_rates rates.csv
+"""
+import argparse
+import sys
+
+from app.core.currency import BASE_CURRENCY, load_rates_file
+from app.core.database import engine
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV file with date,currency,rate columns")
+    args = parser.parse_args()
+
+    try:
+        with engine.begin() as conn:
+            loaded = load_rates_file(conn, args.path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"Loaded {loaded} rates against {BASE_CURRENCY}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
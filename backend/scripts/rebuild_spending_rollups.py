@@ -0,0 +1,71 @@
+"""Recompute spending_rollups from the expenses table.
+
+The API keeps spending_rollups up to date incrementally. This command rebuilds
+it from scratch in one transaction, or with --check only reports buckets whose
+stored count or total differs from a fresh aggregate. Requires PostgreSQL:
+
+    cd backend
+    python -m scripts.rebuild_spending_rollups --check
+    python -m scripts.rebuild_spending_rollups
+"""
+import argparse
+import math
+import sys
+
+from sqlalchemy import delete, insert, select
+
+from app.core.database import engine
+from app.core.rollups import rebuild_query
+from app.models.models import SpendingRollup
+
+COLUMNS = ["wallet_id", "user_id", "category", "month", "count", "total"]
+
+
+def check() -> int:
+    """Print mismatched buckets and return how many there are"""
+    with engine.connect() as conn:
+        expected = {row[:4]: row[4:] for row in conn.execute(rebuild_query())}
+        stored = {
+            row[:4]: row[4:]
+            for row in conn.execute(select(*(SpendingRollup.__table__.c[c] for c in COLUMNS)))
+        }
+
+    mismatched = 0
+    for key in expected.keys() | stored.keys():
+        want = expected.get(key, (0, 0.0))
+        have = stored.get(key, (0, 0.0))
+        if want[0] != have[0] or not math.isclose(want[1], have[1], rel_tol=1e-9, abs_tol=1e-6):
+            mismatched += 1
+            print(f"{key}: stored count={have[0]} total={have[1]}, expected count={want[0]} total={want[1]}")
+    print(f"{len(expected)} buckets checked, {mismatched} mismatched")
+    return mismatched
+
+
+def rebuild() -> None:
+    """Replace every rollup row with a fresh aggregate of the expenses table"""
+    table = SpendingRollup.__table__
+    with engine.begin() as conn:
+        # Block expense writers' rollup upserts until the new rows are in place
+        conn.exec_driver_sql("LOCK TABLE spending_rollups IN EXCLUSIVE MODE")
+        conn.execute(delete(table))
+        result = conn.execute(insert(table).from_select(COLUMNS, rebuild_query()))
+    print(f"Rebuilt {result.rowcount} buckets")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="compare instead of rebuilding")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("rebuild_spending_rollups requires a PostgreSQL DATABASE_URL", file=sys.stderr)
+        return 2
+
+    if args.check:
+        return 1 if check() else 0
+    rebuild()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())